@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+This program times spreadsheet_io.split_on_slash against the previous
+row-wise `apply(pd.Series).stack()` implementation.
+
+Usage:
+    python benchmarks/bench_split_on_slash.py [rows]
+
+Copyright 2018, Child Mind Institute (http://childmind.org), Apache v2.0 License
+
+"""
+import os
+import sys
+top_dir = os.path.abspath(os.path.join(
+    (__file__),
+    os.pardir,
+    os.pardir
+))
+if top_dir not in sys.path:
+    sys.path.append(top_dir)
+try:
+    from mhdb.spreadsheet_io import split_on_slash, trysplit
+except:
+    from mhdb.mhdb.spreadsheet_io import split_on_slash, trysplit
+import numpy as np
+import pandas as pd
+import timeit
+
+
+def legacy_split_on_slash(df, column, delimiter=" / "):
+    # as before split/explode, except for `dropna`: from pandas 3, `stack`
+    # keeps the NaN padding of shorter rows, which earlier pandas dropped
+    df[column] = pd.Series(df[column].apply(lambda x: trysplit(
+        x,
+        delimiter
+    )))
+    s = df.apply(
+        lambda x:
+            pd.Series(
+                x[column]
+            ),
+            axis=1
+    ).stack().dropna().reset_index(
+        level=1,
+        drop=True
+    )
+    s.name = column
+    return(df.drop(column, axis=1).join(s))
+
+
+def sheet(rows):
+    """
+    Function to build a sheet of `rows` rows with a slash-delimited
+    column of one to three pieces and some missing values.
+
+    Parameters
+    ----------
+    rows: int
+
+    Returns
+    -------
+    df: DataFrame
+    """
+    pieces = np.random.RandomState(0).randint(0, 4, rows)
+    return(pd.DataFrame({
+        "index": range(rows),
+        "name": ["row {0}".format(i) for i in range(rows)],
+        "Type": [
+            " / ".join(
+                "type {0}".format(j) for j in range(n)
+            ) if n else np.nan for n in pieces
+        ]
+    }))
+
+
+def main(rows=20000):
+    df = sheet(rows)
+    pd.testing.assert_frame_equal(
+        split_on_slash(df, "Type"),
+        legacy_split_on_slash(df.copy(), "Type"),
+        check_dtype=False
+    )
+    for name, function in [
+        ("apply/stack", legacy_split_on_slash),
+        ("split/explode", split_on_slash)
+    ]:
+        seconds = min(timeit.repeat(
+            lambda: function(df.copy(), "Type"),
+            number=1,
+            repeat=3
+        ))
+        print("{0:>14}: {1:8.4f} s for {2} rows".format(name, seconds, rows))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
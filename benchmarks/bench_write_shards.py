@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+This program times write_shards.write_shards, with 1, 2 and 4 worker
+processes, against writing the same statements graph with
+write_ttl.write_turtle in one process.
+
+Rendering is CPU-bound, so the shards only beat write_turtle with more
+than one CPU.
+
+Usage:
+    python benchmarks/bench_write_shards.py [subjects]
+
+Copyright 2018, Child Mind Institute (http://childmind.org), Apache v2.0 License
+
+"""
+import os
+import sys
+top_dir = os.path.abspath(os.path.join(
+    (__file__),
+    os.pardir,
+    os.pardir
+))
+if top_dir not in sys.path:
+    sys.path.append(top_dir)
+try:
+    from mhdb.write_shards import write_shards
+    from mhdb.write_ttl import write_turtle
+except:
+    from mhdb.mhdb.write_shards import write_shards
+    from mhdb.mhdb.write_ttl import write_turtle
+import tempfile
+import timeit
+
+
+def graph(subjects):
+    """
+    Function to build a statements graph of `subjects` subjects with six
+    statements each.
+
+    Parameters
+    ----------
+    subjects: int
+
+    Returns
+    -------
+    statements: dictionary
+    """
+    return({
+        "mhdb:Subject_{0}".format(i): {
+            "rdfs:label": {'"""Subject {0}"""@en'.format(i)},
+            "rdfs:subClassOf": {"mhdb:Class_{0}".format(i % 97)},
+            "dcterms:contributor": {
+                "mhdb:Person_{0}".format(i % 13),
+                "mhdb:Person_{0}".format(i % 17)
+            },
+            "mhdb:site": {"<http://example.com/site/{0}>".format(i % 29)},
+            "rdfs:comment": {'"""Statement about subject {0}"""@en'.format(
+                i
+            )}
+        } for i in range(subjects)
+    })
+
+
+def subject_chunks(path):
+    with open(path) as fid:
+        return(sorted(fid.read().strip().split("\n\n")))
+
+
+def main(subjects=40000):
+    statements = graph(subjects)
+    directory = tempfile.mkdtemp()
+    reference = os.path.join(directory, "reference.ttl")
+    sharded = os.path.join(directory, "sharded.ttl")
+    print("{0} CPUs, {1} triples".format(os.cpu_count(), sum(
+        len(objects) for predicates in statements.values() for objects in
+        predicates.values()
+    )))
+    seconds = min(timeit.repeat(
+        lambda: write_turtle(statements, reference),
+        number=1,
+        repeat=3
+    ))
+    print("{0:>23}: {1:8.4f} s".format("write_turtle", seconds))
+    expected = subject_chunks(reference)
+    for max_workers in [1, 2, 4]:
+        seconds = min(timeit.repeat(
+            lambda: write_shards(
+                statements,
+                sharded,
+                shards=4,
+                assemble=True,
+                max_workers=max_workers
+            ),
+            number=1,
+            repeat=3
+        ))
+        assert subject_chunks(sharded) == expected
+        print("{0:>23}: {1:8.4f} s".format(
+            "write_shards, {0} worker{1}".format(
+                max_workers,
+                "" if max_workers == 1 else "s"
+            ),
+            seconds
+        ))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+This program contains functions to run mhdb.ingest's workbook ingestion
+functions in worker processes, optionally in row partitions of their main
+sheets, and to merge their partial graphs in a fixed order.
+
+Copyright 2018, Child Mind Institute (http://childmind.org), Apache v2.0 License
+
+"""
+import os
+import sys
+top_dir = os.path.abspath(os.path.join(
+    (__file__),
+    os.pardir,
+    os.pardir
+))
+if top_dir not in sys.path:
+    sys.path.append(top_dir)
+try:
+    from mhdb import ingest
+    from mhdb.ingest import merge_statements
+    from mhdb.statement_store import StatementStore
+    from mhdb.workbook import WorkbookContext
+except:
+    from mhdb.mhdb import ingest
+    from mhdb.mhdb.ingest import merge_statements
+    from mhdb.mhdb.statement_store import StatementStore
+    from mhdb.mhdb.workbook import WorkbookContext
+from concurrent.futures import ProcessPoolExecutor
+
+# Ingestion functions in the order their graphs are merged, each with the
+# (workbook name, sheet name) whose rows it can be partitioned on
+INGEST_FUNCTIONS = {
+    "BehaviorSheet1": ("behavior", "Sheet1"),
+    "MHealthPeople": ("technology", "MHealthPeople"),
+    "Project": ("technology", "Project")
+}
+
+
+class RowPartition(object):
+    """
+    Workbook that returns one contiguous block of rows of one sheet (and
+    every other sheet whole), for ingesting a sheet in partitions.
+
+    Partition `partition` of `partitions` holds rows
+    [n * partition // partitions, n * (partition + 1) // partitions) of an
+    n-row sheet, renumbered from 0.
+
+    Parameters
+    ----------
+    workbook: workbook
+        object with a `parse(sheet_name, **kwargs)` method
+
+    sheet_name: string
+        sheet to partition
+
+    partition: int
+        0-based partition number
+
+    partitions: int
+        number of partitions
+
+    Example
+    -------
+    >>> import pandas as pd
+    >>> class Workbook(object):
+    ...     sheet_names = ["Sheet1"]
+    ...     def parse(self, sheet_name, **kwargs):
+    ...         return pd.DataFrame({"goose": range(5)})
+    >>> for partition in range(2):
+    ...     print(list(RowPartition(
+    ...         Workbook(),
+    ...         "Sheet1",
+    ...         partition,
+    ...         2
+    ...     ).parse("Sheet1")["goose"]))
+    [0, 1]
+    [2, 3, 4]
+    """
+    def __init__(self, workbook, sheet_name, partition, partitions):
+        self.workbook = workbook
+        self.sheet_name = sheet_name
+        self.partition = partition
+        self.partitions = partitions
+
+    @property
+    def sheet_names(self):
+        """
+        List of the workbook's sheet names.
+        """
+        return(list(self.workbook.sheet_names))
+
+    def parse(self, sheet_name, **kwargs):
+        """
+        Function to parse a sheet, keeping only this partition's rows of
+        the partitioned sheet.
+
+        Parameters
+        ----------
+        sheet_name: string
+
+        kwargs: keyword arguments for the workbook's parse method
+
+        Returns
+        -------
+        sheet: DataFrame
+        """
+        sheet = self.workbook.parse(sheet_name, **kwargs)
+        if sheet_name != self.sheet_name or self.partitions == 1:
+            return(sheet)
+        return(sheet.iloc[
+            len(sheet) * self.partition // self.partitions:
+            len(sheet) * (self.partition + 1) // self.partitions
+        ].reset_index(drop=True))
+
+
+def build(
+    workbooks,
+    statements=None,
+    functions=None,
+    partitions=1,
+    max_workers=None,
+    cache_dir=None,
+    schemas=None
+):
+    """
+    Function to run ingestion functions in worker processes and merge
+    their graphs.
+
+    Each (function, partition) task ingests into its own StatementStore in
+    a worker, which is pickled back (terms and integer columns only) and
+    merged into statements in task order, so the result, including its
+    statement order, does not depend on max_workers or on which task
+    finishes first. Row partitions of one function are contiguous and
+    merged in row order, so partitioning does not change the result
+    either.
+
+    Parameters
+    ----------
+    workbooks: dictionary or WorkbookContext
+        key: string
+            workbook name: "behavior", "mentalhealth" and/or "technology"
+        value: string or workbook
+            path to a workbook file or a picklable object with a
+            `parse(sheet_name, **kwargs)` method
+        If a WorkbookContext, its sources, cache directory and schemas are
+        used and the workers' parse counts and times are added to it.
+
+    statements: dictionary or StatementStore, optional
+        graph to merge into (a new StatementStore if None)
+
+    functions: list of strings, optional
+        names of mhdb.ingest functions to run, merged in INGEST_FUNCTIONS
+        order; default all of INGEST_FUNCTIONS
+
+    partitions: int or dictionary, optional
+        number of row partitions for every function, or a dictionary of
+        numbers by function name (default 1)
+
+    max_workers: int, optional
+        number of worker processes, default the number of CPUs (at most
+        the number of tasks); 1 runs the tasks in this process
+
+    cache_dir: string, optional
+        cache directory for CachedWorkbooks
+
+    schemas: dictionary, optional
+        column types by (workbook name, sheet name); see WorkbookContext
+
+    Returns
+    -------
+    statements: dictionary or StatementStore
+        key: string
+            RDF subject
+        value: dictionary
+            key: string
+                RDF predicate
+            value: {string}
+                set of RDF objects
+
+    Example
+    -------
+    >>> import pandas as pd
+    >>> class Workbook(object):
+    ...     sheet_names = ["MHealthPeople"]
+    ...     def parse(self, sheet_name, **kwargs):
+    ...         return pd.DataFrame({
+    ...             "URL": ["http://goose.org", "http://duck.org"],
+    ...             "MHealthPeople/Labs": ["Goose Lab", "Duck Lab"],
+    ...             "Site": ["Pond", "Pond"],
+    ...             **{
+    ...                 "Affiliate{0}".format(i): [None, None] for i in
+    ...                 range(1, 10)
+    ...             }
+    ...         })
+    >>> graphs = [build(
+    ...     {"technology": Workbook()},
+    ...     functions=["MHealthPeople"],
+    ...     partitions=partitions,
+    ...     max_workers=1
+    ... ) for partitions in [1, 2]]
+    >>> print(list(graphs[0].triples()) == list(graphs[1].triples()))
+    True
+    >>> print(sorted(graphs[1]["<http://duck.org>"]["rdfs:label"]))
+    ['\"""Duck Lab\"""@en']
+    """
+    if isinstance(workbooks, WorkbookContext):
+        context = workbooks
+        workbooks = context.sources
+        cache_dir = context.cache_dir
+        schemas = context.schemas
+    else:
+        context = None
+    if statements is None:
+        statements = StatementStore()
+    tasks = ingest_tasks(functions, partitions)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(tasks)))
+    arguments = [
+        (task, workbooks, cache_dir, schemas) for task in tasks
+    ]
+    if max_workers == 1:
+        results = [_ingest_task(*argument) for argument in arguments]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = [
+                future.result() for future in [
+                    executor.submit(_ingest_task, *argument) for argument in
+                    arguments
+                ]
+            ]
+    for partial, parse_counts, parse_times in results:
+        statements = merge_statements(statements, partial)
+        if context is not None:
+            for key in parse_counts:
+                context.parse_counts[key] = context.parse_counts.get(
+                    key,
+                    0
+                ) + parse_counts[key]
+                context.parse_times[key] = context.parse_times.get(
+                    key,
+                    0.0
+                ) + parse_times[key]
+    return(statements)
+
+
+def ingest_tasks(functions=None, partitions=1):
+    """
+    Function to list (function name, partition, partitions) tasks in merge
+    order.
+
+    Parameters
+    ----------
+    functions: list of strings, optional
+        names of mhdb.ingest functions, default all of INGEST_FUNCTIONS
+
+    partitions: int or dictionary, optional
+        number of row partitions for every function, or a dictionary of
+        numbers by function name (default 1)
+
+    Returns
+    -------
+    tasks: list of 3-tuples
+        (function name, 0-based partition, number of partitions)
+
+    Example
+    -------
+    >>> for task in ingest_tasks(["Project", "BehaviorSheet1"], {"Project": 2}):
+    ...     print(task)
+    ('BehaviorSheet1', 0, 1)
+    ('Project', 0, 2)
+    ('Project', 1, 2)
+    """
+    functions = list(INGEST_FUNCTIONS) if functions is None else functions
+    for function in functions:
+        if function not in INGEST_FUNCTIONS:
+            raise Exception(
+                "No ingestion function named {0}; expected one of {1}".format(
+                    function,
+                    ", ".join(INGEST_FUNCTIONS)
+                )
+            )
+    tasks = []
+    for function in INGEST_FUNCTIONS:
+        if function in functions:
+            n = partitions.get(function, 1) if isinstance(
+                partitions,
+                dict
+            ) else partitions
+            tasks.extend([
+                (function, partition, max(1, n)) for partition in range(
+                    max(1, n)
+                )
+            ])
+    return(tasks)
+
+
+def _ingest_task(task, workbooks, cache_dir=None, schemas=None):
+    function, partition, partitions = task
+    workbook_name, sheet_name = INGEST_FUNCTIONS[function]
+    context = WorkbookContext(workbooks, cache_dir, schemas)
+    if partitions > 1:
+        context.add(workbook_name, RowPartition(
+            context.workbook(workbook_name),
+            sheet_name,
+            partition,
+            partitions
+        ))
+    statements = getattr(ingest, function)(
+        statements=StatementStore(),
+        context=context
+    )
+    return(statements, context.parse_counts, context.parse_times)
@@ -12,15 +12,32 @@ Copyright 2018, Child Mind Institute (http://childmind.org), Apache v2.0 License
 """
 try:
     from mhdb.spreadsheet_io import download_google_sheet, return_string
-    from mhdb.write_ttl import check_iri, language_string
+    from mhdb.statement_store import StatementStore
+    from mhdb.vocabulary import PROJECT_VOCABULARY, SITE_VOCABULARY
+    from mhdb.workbook import apply_schema, CachedWorkbook, int_list, \
+        WorkbookContext
+    from mhdb.write_ttl import check_iri, check_iris, language_string, \
+        language_strings
 except:
     from mhdb.mhdb.spreadsheet_io import download_google_sheet, return_string
-    from mhdb.mhdb.write_ttl import check_iri, language_string
+    from mhdb.mhdb.statement_store import StatementStore
+    from mhdb.mhdb.vocabulary import PROJECT_VOCABULARY, SITE_VOCABULARY
+    from mhdb.mhdb.workbook import apply_schema, CachedWorkbook, int_list, \
+        WorkbookContext
+    from mhdb.mhdb.write_ttl import check_iri, check_iris, language_string, \
+        language_strings
 import numpy as np
 import pandas as pd
+import re
 
+_AFFILIATE_PATTERN = re.compile(
+    r"^\s*(?P<first>[^ (]*)"
+    r"(?: (?P<rest>[^(]*))?"
+    r"(?:\((?P<parenthetical>[^(]*))?"
+)
 
-def add_if(subject, predicate, object, statements={}):
+
+def add_if(subject, predicate, object, statements=None):
     """
     Function to add an object and predicate to a dictionary, checking for that
     predicate first.
@@ -36,7 +53,7 @@ def add_if(subject, predicate, object, statements={}):
     object: string
         Turtle-formatted IRI
 
-    statements: dictionary
+    statements: dictionary or StatementStore
         key: string
             RDF subject
         value: dictionary
@@ -60,7 +77,14 @@ def add_if(subject, predicate, object, statements={}):
     -------
     >>> print(add_if(":goose", ":chases", ":it"))
     {':goose': {':chases': {':it'}}}
+    >>> print(add_if(":goose", ":chases", ":it", StatementStore()))
+    StatementStore({':goose': {':chases': {':it'}}})
     """
+    if statements is None:
+        statements = {}
+    if isinstance(statements, StatementStore):
+        statements.add(subject, predicate, object)
+        return(statements)
     if subject not in statements:
         statements[subject] = {}
     if predicate not in statements[subject]:
@@ -74,7 +98,78 @@ def add_if(subject, predicate, object, statements={}):
     return(statements)
 
 
-def audience_statements(statements={}):
+def add_statement_frames(frames, statements=None):
+    """
+    Function to add the statements in `statement_frame`s, row by row in
+    row order, and within a row in order of "order" and then of the
+    frames.
+
+    Parameters
+    ----------
+    frames: list of DataFrames
+        outputs of `statement_frame`
+
+    statements: dictionary or StatementStore
+        key: string
+            RDF subject
+        value: dictionary
+            key: string
+                RDF predicate
+            value: {string}
+                set of RDF objects
+
+    Returns
+    -------
+    statements: dictionary or StatementStore
+        key: string
+            RDF subject
+        value: dictionary
+            key: string
+                RDF predicate
+            value: {string}
+                set of RDF objects
+
+    Example
+    -------
+    >>> statements = add_statement_frames([
+    ...     statement_frame([1, 0], [(["goose", "duck"], ":is", ":bird")], 1),
+    ...     statement_frame([0], [("duck", ":says", ":quack")], 0)
+    ... ])
+    >>> print(list(statements))
+    ['duck', 'goose']
+    >>> print(list(statements["duck"]))
+    [':says', ':is']
+    """
+    if statements is None:
+        statements = {}
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return(statements)
+    triples = pd.concat(frames, ignore_index=True)
+    order = np.lexsort((
+        np.arange(len(triples)),
+        triples["order"].values,
+        triples["row"].values
+    ))
+    triples = zip(
+        triples["subject"].values[order],
+        triples["predicate"].values[order],
+        triples["object"].values[order]
+    )
+    if isinstance(statements, StatementStore):
+        for subject, predicate, object in triples:
+            statements.add(subject, predicate, object)
+        return(statements)
+    for subject, predicate, object in triples:
+        predicates = statements.setdefault(subject, {})
+        if predicate in predicates:
+            predicates[predicate].add(object)
+        else:
+            predicates[predicate] = {object}
+    return(statements)
+
+
+def audience_statements(statements=None):
     """
     Function to generate PeopleAudience subClasses.
 
@@ -136,21 +231,131 @@ def audience_statements(statements={}):
                 schema_gender
             }
         }
-        if gendered_iri not in statements:
-            statements[gendered_iri] = g_statements
-        else:
-            statements[gendered_iri] = {
-                **statements[gendered_iri],
-                **g_statements
-            }
+        statements = merge_statements(
+            statements,
+            {gendered_iri: g_statements}
+        )
     return(statements)
 
 
+def behavior_frame(sheet, gender, reference):
+    """
+    Function to resolve each behavior's sign-or-symptom class, source and
+    audience gender, joining the gender and reference sheets with left
+    merges.
+
+    Parameters
+    ----------
+    sheet: DataFrame
+        1sQp63K5nGrYSgK2ZvsTfTDmlM4W5_eFHfy6Ckoi7yP4::Sheet1
+
+    gender: DataFrame
+        1sQp63K5nGrYSgK2ZvsTfTDmlM4W5_eFHfy6Ckoi7yP4::gender
+
+    reference: DataFrame
+        mentalhealth.xls::Reference
+
+    Returns
+    -------
+    behavior: DataFrame
+        one row per row of sheet, in order, with columns
+        "symptom": symptom
+        "sign_or_symptom": Turtle-formatted class IRI
+        "source": Turtle-formatted reference IRI, or missing
+        "audience_gender": gender, or missing
+
+    Example
+    -------
+    >>> import numpy as np
+    >>> import pandas as pd
+    >>> behavior = behavior_frame(
+    ...     pd.DataFrame({
+    ...         "symptom": ["honking", "hissing", "waddling"],
+    ...         "sign_or_symptom_index": [1, 2, np.nan],
+    ...         "reference_index (refer to reference in our master "
+    ...         "spreadsheet. 8=dsm, 84=us)": [8, 84, np.nan],
+    ...         "gender_index": [np.nan, 2.0, 1.0]
+    ...     }),
+    ...     pd.DataFrame({"index": [1, 2], "gender": [":Male", ":Female"]}),
+    ...     pd.DataFrame({
+    ...         "index": [8, 84],
+    ...         "ReferenceLink": ["http://example.com/dsm", np.nan]
+    ...     })
+    ... )
+    >>> for sign_or_symptom in behavior["sign_or_symptom"]:
+    ...     print(sign_or_symptom)
+    health-lifesci:MedicalSign
+    health-lifesci:MedicalSymptom
+    health-lifesci:MedicalSignOrSymptom
+    >>> print(behavior["source"].notna().tolist())
+    [True, False, False]
+    >>> print(behavior["audience_gender"].fillna("").tolist())
+    ['', ':Female', ':Male']
+    """
+    reference_column = (
+        "reference_index (refer to reference in our master spreadsheet. "
+        "8=dsm, 84=us)"
+    )
+    behavior = apply_schema(
+        sheet[[
+            "symptom",
+            "sign_or_symptom_index",
+            reference_column,
+            "gender_index"
+        ]],
+        {
+            "sign_or_symptom_index": "Int64",
+            reference_column: "Int64",
+            "gender_index": "Int64"
+        }
+    ).rename(columns={reference_column: "reference_index"})
+    reference = apply_schema(
+        reference[["index", "ReferenceLink"]],
+        {"index": "Int64"}
+    ).dropna(subset=["index"]).drop_duplicates("index")
+    reference = pd.DataFrame({
+        "reference_index": reference["index"].values,
+        "source": [
+            None if pd.isna(link) else check_iri(link) for link in reference[
+                "ReferenceLink"
+            ]
+        ]
+    })
+    gender = apply_schema(
+        gender[["index", "gender"]],
+        {"index": "Int64"}
+    ).dropna(subset=["index"]).drop_duplicates("index").rename(columns={
+        "index": "gender_index",
+        "gender": "audience_gender"
+    })
+    behavior = behavior.merge(
+        reference,
+        how="left",
+        on="reference_index"
+    ).merge(
+        gender,
+        how="left",
+        on="gender_index"
+    )
+    behavior["sign_or_symptom"] = behavior["sign_or_symptom_index"].map({
+        1: "health-lifesci:MedicalSign",
+        2: "health-lifesci:MedicalSymptom"
+    }).fillna("health-lifesci:MedicalSignOrSymptom")
+    behavior.index = sheet.index
+    return(behavior[[
+        "symptom",
+        "sign_or_symptom",
+        "source",
+        "audience_gender"
+    ]])
+
+
 def BehaviorSheet1(
-    behavior_xls,
+    behavior_xls=None,
     mentalhealth_xls=None,
     sign_or_symptom=None,
-    statements={}
+    statements=None,
+    context=None
 ):
     '''
     Function to ingest 1sQp63K5nGrYSgK2ZvsTfTDmlM4W5_eFHfy6Ckoi7yP4 Sheet1
@@ -172,6 +377,9 @@ def BehaviorSheet1(
             value: {string}
                 set of RDF objects
 
+    context: WorkbookContext, optional
+        supplies the "behavior" and "mentalhealth" workbooks not passed
+
     Returns
     -------
     statements: dictionary
@@ -211,6 +419,12 @@ def BehaviorSheet1(
     ... }).split("\\n\\t")[0])
     mhdb:despair rdfs:label """despair"""@en ;
     '''
+    behavior_xls = context_workbook(behavior_xls, context, "behavior")
+    mentalhealth_xls = context_workbook(
+        mentalhealth_xls,
+        context,
+        "mentalhealth"
+    )
     sheet = behavior_xls.parse("Sheet1")
     gender = behavior_xls.parse("gender")
     statements = audience_statements(statements)
@@ -223,66 +437,93 @@ def BehaviorSheet1(
             )
         except:
             mentalhealthFILE = 'data/mentalhealth.xlsx'
-        mentalhealth_xls = pd.ExcelFile(mentalhealthFILE)
+        mentalhealth_xls = CachedWorkbook(mentalhealthFILE)
 
     mh_reference = mentalhealth_xls.parse("Reference")
+    behavior = behavior_frame(sheet, gender, mh_reference)
+
+    rows = np.arange(len(behavior))
+    symptom_iris = check_iris(behavior["symptom"]).values
+    symptom_labels = behavior["symptom"].map(language_string).values
+    has_source = behavior["source"].notna().values
+    has_gender = behavior["audience_gender"].map(
+        lambda audience_gender: isinstance(audience_gender, str) and bool(
+            audience_gender
+        )
+    ).values.astype(bool)
+    audience_genders = behavior["audience_gender"].values[has_gender]
+
+    return(add_statement_frames([
+        statement_frame(
+            rows,
+            [
+                (symptom_iris, "rdfs:label", symptom_labels),
+                (
+                    symptom_iris,
+                    "rdfs:subClassOf",
+                    behavior["sign_or_symptom"].values
+                )
+            ],
+            0
+        ),
+        statement_frame(
+            rows[has_source],
+            [(
+                symptom_iris[has_source],
+                "dcterms:source",
+                behavior["source"].values[has_source]
+            )],
+            1
+        ),
+        statement_frame(
+            rows[has_gender],
+            [
+                (
+                    symptom_iris[has_gender],
+                    "schema:audience",
+                    audience_genders
+                ),
+                (
+                    symptom_iris[has_gender],
+                    "schema:epidemiology",
+                    audience_genders
+                )
+            ],
+            2
+        )
+    ], statements))
 
-    for row in sheet.iterrows():
-        sign_or_symptom = "health-lifesci:MedicalSign" if (row[1][
-            "sign_or_symptom_index"
-        ]) == 1 else "health-lifesci:MedicalSymptom" if (row[1][
-            "sign_or_symptom_index"
-        ] == 2) else "health-lifesci:MedicalSignOrSymptom"
-
-        source = mh_reference[
-            mh_reference["index"] == row[1][
-                "reference_index (refer to reference in our master spreadsheet."
-                " 8=dsm, 84=us)"
-            ]
-        ]["ReferenceLink"].values[0]
-        source = None if isinstance(
-            source,
-            float
-        ) else check_iri(source)
-
-        symptom_label = language_string(row[1]["symptom"])
 
-        symptom_iri = check_iri(row[1]["symptom"])
+def context_workbook(xls, context, name):
+    """
+    Function to return a workbook, taking it from a WorkbookContext if it
+    was not given.
 
-        audience_gender = gender[
-            gender["index"] == row[1]["gender_index"]
-        ]["gender"]
+    Parameters
+    ----------
+    xls: spreadsheet workbook or None
 
-        audience_gender = None if not audience_gender.size else \
-        audience_gender.values[
-            0
-        ]
+    context: WorkbookContext or None
 
-        for predicates in [
-            ("rdfs:label", symptom_label),
-            ("rdfs:subClassOf", sign_or_symptom),
-            ("dcterms:source", source)
-        ]:
-            statements = add_if(
-                symptom_iri,
-                predicates[0],
-                predicates[1],
-                statements
-            )
+    name: string
+        workbook name in context
 
-        if audience_gender:
-            for prop in [
-                "schema:audience",
-                "schema:epidemiology"
-            ]:
-                statements = add_if(
-                    symptom_iri,
-                    prop,
-                    audience_gender,
-                    statements
-                )
+    Returns
+    -------
+    xls: spreadsheet workbook or None
+        xls if given, else context[name] if context has it, else None
 
-    return(statements)
+    Example
+    -------
+    >>> context = WorkbookContext({"technology": "data/technology.xlsx"})
+    >>> print(context_workbook(None, context, "technology").name)
+    technology
+    >>> print(context_workbook(None, context, "mentalhealth"))
+    None
+    """
+    if xls is None and context is not None and name in context:
+        return(context[name])
+    return(xls)
 
 
 def disorder_iri(
@@ -300,7 +541,8 @@ def disorder_iri(
             28,
             56,
             78
-        ]
+        ],
+        disorders=None
     ):
     """
     Function to figure out IRIs for disorders based on
@@ -321,6 +563,10 @@ def disorder_iri(
         list of indices of diagnostic specifiers to be preceded by disorder
         names
 
+    disorders: DataFrame, optional
+        output of `disorder_lookup`; if given, mentalhealth_xls is not
+        parsed again
+
     Returns
     -------
     statements: dictionary
@@ -332,155 +578,212 @@ def disorder_iri(
             value: {string}
                 set of RDF objects
     """
-    disorder = mentalhealth_xls.parse("Disorder")
-    severity = mentalhealth_xls.parse("DisorderSeverity")
-    specifier = mentalhealth_xls.parse("DiagnosticSpecifier")
-    criterion = mentalhealth_xls.parse("DiagnosticCriterion")
-    disorderSeries = disorder[disorder["index"]==index]
-    disorder_name = disorderSeries["DisorderName"].values[0]
-    if (
-        not isinstance(
-            disorderSeries["DiagnosticSpecifier_index"].values[0],
-            float
-        )
-    ) or (
-        not np.isnan(
-            disorderSeries["DiagnosticSpecifier_index"].values[0]
+    if disorders is None:
+        disorders = disorder_lookup(
+            mentalhealth_xls,
+            pre_specifiers_indices,
+            post_specifiers_indices
         )
+    disorder = disorders.loc[index]
+    statements = {disorder["IRI"]: {"rdfs:label": [disorder["label"]]}}
+    return(statements)
+
+
+def disorder_lookup(
+        mentalhealth_xls,
+        pre_specifiers_indices=[
+            6,
+            7,
+            24,
+            25,
+            26
+        ],
+        post_specifiers_indices=[
+            27,
+            28,
+            56,
+            78
+        ]
     ):
-        disorder_name = " ".join([
-            specifier[
-                specifier[
-                    "index"
-                ]==disorderSeries[
-                    "DiagnosticSpecifier_index"
-                ].values[0]
-            ]["DiagnosticSpecifierName"].values[0],
-            disorder_name
-        ]) if disorderSeries[
-            "DiagnosticSpecifier_index"
-        ].values[0] in pre_specifiers_indices else " ".join([
-            disorder_name,
-            specifier[
-                specifier[
-                    "index"
-                ]==disorderSeries[
-                    "DiagnosticSpecifier_index"
-                ].values[0]
-            ]["DiagnosticSpecifierName"].values[0]
-        ]) if disorderSeries[
-            "DiagnosticSpecifier_index"
-        ].values[0] in post_specifiers_indices else ", ".join([
-            disorder_name,
-            specifier[
-                specifier[
-                    "index"
-                ]==disorderSeries[
-                    "DiagnosticSpecifier_index"
-                ].values[0]
-            ]["DiagnosticSpecifierName"].values[0]
-        ])
-    disorder_name = " with ".join([
-        disorder_name,
-        criterion[
-            criterion["index"]==disorderSeries[
-                "DiagnosticInclusionCriterion_index"
-            ]
-        ]["DiagnosticCriterionName"].values[0]
-    ]) if (
-        not isinstance(
-            disorderSeries["DiagnosticInclusionCriterion_index"].values[0],
-            float
-        )
-    ) or (
-        not np.isnan(
-            disorderSeries["DiagnosticInclusionCriterion_index"].values[0]
-        )
-    ) else disorder_name
-    disorder_name = " and ".join([
-        disorder_name,
-        criterion[
-            criterion["index"]==disorderSeries[
-                "DiagnosticInclusionCriterion2_index"
-            ]
-        ]["DiagnosticCriterionName"].values[0]
-    ]) if (
-        not isinstance(
-            disorderSeries["DiagnosticInclusionCriterion2_index"].values[0],
-            float
-        )
-    ) or (
-        not np.isnan(
-            disorderSeries["DiagnosticInclusionCriterion2_index"].values[0]
-        )
-    ) else disorder_name
-    disorder_name = " without ".join([
-        disorder_name,
-        criterion[
-            criterion["index"]==disorderSeries[
-                "DiagnosticExclusionCriterion_index"
-            ]
-        ]["DiagnosticCriterionName"].values[0]
-    ]) if (
-        not isinstance(
-            disorderSeries["DiagnosticExclusionCriterion_index"].values[0],
-            float
-        )
-    ) or (
-        not np.isnan(
-            disorderSeries["DiagnosticExclusionCriterion_index"].values[0]
-        )
-    ) else disorder_name
-    disorder_name = " and ".join([
-        disorder_name,
-        criterion[
-            criterion["index"]==disorderSeries[
-                "DiagnosticExclusionCriterion2_index"
-            ]
-        ]["DiagnosticCriterionName"].values[0]
-    ]) if (
-        not isinstance(
-            disorderSeries["DiagnosticExclusionCriterion2_index"].values[0],
-            float
-        )
-    ) or (
-        not np.isnan(
-            disorderSeries["DiagnosticExclusionCriterion2_index"].values[0]
+    """
+    Function to parse mentalhealth.xls::Disorder and its related sheets
+    once and compose every disorder's name, IRI and label.
+
+    Parameters
+    ----------
+    mentalhealth_xls: spreadsheet workbook
+        1MfW9yDw7e8MLlWWSBBXQAC2Q4SDiFiMMb7mRtr7y97Q
+
+    pre_specifiers_indices: [int], optional
+        list of indices of diagnostic specifiers to precede disorder names
+
+    post_specifiers_indices: [int], optional
+        list of indices of diagnostic specifiers to be preceded by disorder
+        names
+
+    Returns
+    -------
+    disorders: DataFrame
+        see `disorder_names`
+    """
+    return(
+        disorder_names(
+            mentalhealth_xls.parse("Disorder"),
+            mentalhealth_xls.parse("DisorderSeverity"),
+            mentalhealth_xls.parse("DiagnosticSpecifier"),
+            mentalhealth_xls.parse("DiagnosticCriterion"),
+            pre_specifiers_indices,
+            post_specifiers_indices
         )
-    ) else disorder_name
-    disorder_name = " ".join([
-        severity[
-            severity[
-                "index"
-            ]==int(disorderSeries[
-                "DisorderSeverity_index"
-            ])
-        ]["DisorderSeverityName"].values[0],
-        disorder_name
-    ]) if (
-        not isinstance(
-            disorderSeries[
-                "DisorderSeverity_index"
-            ].values[0],
-            float
+    )
+
+
+def disorder_names(
+        disorder,
+        severity,
+        specifier,
+        criterion,
+        pre_specifiers_indices=[
+            6,
+            7,
+            24,
+            25,
+            26
+        ],
+        post_specifiers_indices=[
+            27,
+            28,
+            56,
+            78
+        ]
+    ):
+    """
+    Function to compose the names, IRIs and labels of all disorders in one
+    pass over the Disorder table.
+
+    Parameters
+    ----------
+    disorder: DataFrame
+        mentalhealth.xls::Disorder
+
+    severity: DataFrame
+        mentalhealth.xls::DisorderSeverity
+
+    specifier: DataFrame
+        mentalhealth.xls::DiagnosticSpecifier
+
+    criterion: DataFrame
+        mentalhealth.xls::DiagnosticCriterion
+
+    pre_specifiers_indices: [int], optional
+        list of indices of diagnostic specifiers to precede disorder names
+
+    post_specifiers_indices: [int], optional
+        list of indices of diagnostic specifiers to be preceded by disorder
+        names
+
+    Returns
+    -------
+    disorders: DataFrame
+        indexed by Disorder "index", with columns
+        "DisorderName": composed disorder name
+        "IRI": Turtle-formatted IRI
+        "label": Turtle-formatted language string
+
+    Example
+    -------
+    >>> import numpy as np
+    >>> import pandas as pd
+    >>> disorders = disorder_names(
+    ...     pd.DataFrame({
+    ...         "index": [1, 2, 3],
+    ...         "DisorderName": ["goose", "duck", "swan"],
+    ...         "DiagnosticSpecifier_index": [6, 27, np.nan],
+    ...         "DiagnosticInclusionCriterion_index": [np.nan, 1, 1],
+    ...         "DiagnosticInclusionCriterion2_index": [np.nan, np.nan, 2],
+    ...         "DiagnosticExclusionCriterion_index": [np.nan, 2, np.nan],
+    ...         "DiagnosticExclusionCriterion2_index": [np.nan] * 3,
+    ...         "DisorderSeverity_index": [1, np.nan, np.nan]
+    ...     }),
+    ...     pd.DataFrame({"index": [1], "DisorderSeverityName": ["mild"]}),
+    ...     pd.DataFrame({
+    ...         "index": [6, 27],
+    ...         "DiagnosticSpecifierName": ["grey", "in a row"]
+    ...     }),
+    ...     pd.DataFrame({
+    ...         "index": [1, 2],
+    ...         "DiagnosticCriterionName": ["wings", "webbed feet"]
+    ...     })
+    ... )
+    >>> for name in disorders["DisorderName"]:
+    ...     print(name)
+    mild grey goose
+    duck in a row with wings without webbed feet
+    swan with wings and webbed feet
+    >>> print(disorders.loc[3, "IRI"])
+    mhdb:swan_with_wings_and_webbed_feet
+    """
+    names = disorder["DisorderName"].astype(str)
+
+    def lookup(column, table, value_column):
+        keys = disorder[column]
+        values = keys.map(
+            table.drop_duplicates("index").set_index("index")[value_column]
         )
-    ) or (
-        not np.isnan(
-            disorderSeries[
-                "DisorderSeverity_index"
-            ].values[0]
+        return(keys.notna() & values.notna(), values.astype(str))
+
+    has_specifier, specifier_names = lookup(
+        "DiagnosticSpecifier_index",
+        specifier,
+        "DiagnosticSpecifierName"
+    )
+    is_pre = disorder["DiagnosticSpecifier_index"].isin(
+        pre_specifiers_indices
+    )
+    is_post = disorder["DiagnosticSpecifier_index"].isin(
+        post_specifiers_indices
+    )
+    names = names.mask(
+        has_specifier & is_pre,
+        specifier_names + " " + names
+    ).mask(
+        has_specifier & ~is_pre & is_post,
+        names + " " + specifier_names
+    ).mask(
+        has_specifier & ~is_pre & ~is_post,
+        names + ", " + specifier_names
+    )
+    for column, joiner in [
+        ("DiagnosticInclusionCriterion_index", " with "),
+        ("DiagnosticInclusionCriterion2_index", " and "),
+        ("DiagnosticExclusionCriterion_index", " without "),
+        ("DiagnosticExclusionCriterion2_index", " and ")
+    ]:
+        has_criterion, criterion_names = lookup(
+            column,
+            criterion,
+            "DiagnosticCriterionName"
         )
-    ) else disorder_name
-    iri = check_iri(disorder_name)
-    label = language_string(disorder_name)
-    statements = {iri: {"rdfs:label": [label]}}
-    return(statements)
+        names = names.mask(has_criterion, names + joiner + criterion_names)
+    has_severity, severity_names = lookup(
+        "DisorderSeverity_index",
+        severity,
+        "DisorderSeverityName"
+    )
+    names = names.mask(has_severity, severity_names + " " + names)
+    return(
+        pd.DataFrame({
+            "DisorderName": names.values,
+            "IRI": names.map(check_iri).values,
+            "label": names.map(language_string).values
+        }, index=disorder["index"].values)
+    )
 
 
 def doi_iri(
     doi,
     title=None,
-    statements={}
+    statements=None
 ):
     """
     Function to create relevant statements about a DOI.
@@ -541,9 +844,126 @@ def doi_iri(
 
 
 
+def lookup_index(
+    lookup_sheet,
+    lookup_key_column,
+    lookup_value_column,
+    value_format=check_iri
+):
+    """
+    Function to build a hash index from a foreign table's integer keys to
+    Turtle-formatted IRIs, for use with `object_split_lookups`.
+
+    Parameters
+    ----------
+    lookup_sheet: DataFrame
+        foreign table
+
+    lookup_key_column: string
+        foreign table key column header
+
+    lookup_value_column: string
+        foreign table value column header
+
+    value_format: function or None, optional
+        function to format each value, default check_iri; None keeps
+        values as they are
+
+    Returns
+    -------
+    index: dictionary
+        key: int
+            foreign key (first occurrence wins)
+        value: string
+            Turtle-formatted IRI
+
+    Example
+    -------
+    >>> import pandas as pd
+    >>> sheet = pd.DataFrame({
+    ...     "index": [0.0, 1.0, 2.0],
+    ...     "bird": [":duck", None, ":swan"]
+    ... })
+    >>> print(lookup_index(sheet, "index", "bird"))
+    {0: ':duck', 2: ':swan'}
+    """
+    keys = pd.to_numeric(lookup_sheet[lookup_key_column], errors="coerce")
+    values = lookup_sheet[lookup_value_column]
+    present = keys.notna() & values.notna()
+    index = {}
+    for key, value in zip(
+        keys[present].astype(int),
+        values[present]
+    ):
+        if key not in index:
+            index[key] = value_format(value) if value_format else value
+    return(index)
+
+
+def merge_statements(statements, new_statements):
+    """
+    Function to merge one statements graph into another in place.
+
+    Conflict policy: a graph is a set of triples, so merging is a union.
+    For a subject and predicate in both graphs, the objects are combined
+    and deduplicated; nothing already in `statements` is replaced or
+    removed. Object collections from `new_statements` are copied, never
+    shared.
+
+    Parameters
+    ----------
+    statements: dictionary or StatementStore, optional
+        graph to update (a new dictionary if None)
+        key: string
+            RDF subject
+        value: dictionary
+            key: string
+                RDF predicate
+            value: {string}
+                set of RDF objects
+
+    new_statements: dictionary or StatementStore
+        graph to merge into statements (objects may be any iterable)
+
+    Returns
+    -------
+    statements: dictionary or StatementStore
+        the updated statements
+
+    Example
+    -------
+    >>> statements = {":goose": {":chases": {":it"}}}
+    >>> merged = merge_statements(statements, {
+    ...     ":goose": {":chases": [":it", ":duck"], ":honks": {":loudly"}},
+    ...     ":duck": {":sits": {":still"}}
+    ... })
+    >>> merged is statements
+    True
+    >>> print(sorted(statements[":goose"][":chases"]))
+    [':duck', ':it']
+    >>> print(statements[":duck"])
+    {':sits': {':still'}}
+    """
+    if statements is None:
+        statements = {}
+    if isinstance(statements, StatementStore):
+        return(statements.update_statements(new_statements))
+    for subject in new_statements:
+        predicates = statements.setdefault(subject, {})
+        for predicate, objects in new_statements[subject].items():
+            if predicate in predicates:
+                if not isinstance(predicates[predicate], set):
+                    predicates[predicate] = set(predicates[predicate])
+                predicates[predicate].update(objects)
+            else:
+                predicates[predicate] = set(objects)
+    return(statements)
+
+
 def MHealthPeople(
-    technology_xls,
-    statements={}
+    technology_xls=None,
+    statements=None,
+    context=None
 ):
     '''
     Function to ingest 1cuJXT1Un7HPLYcDyHAXprH-wGS1azuUNmVQnb3dV1cY
@@ -563,6 +983,9 @@ def MHealthPeople(
             value: {string}
                 set of RDF objects
 
+    context: WorkbookContext, optional
+        supplies the "technology" workbook if not passed
+
     Returns
     -------
     statements: dictionary
@@ -578,183 +1001,135 @@ def MHealthPeople(
     -------
     # TODO
     '''
-    for pred in [
-        ("rdfs:label", language_string("site")),
-        ("rdfs:comment", language_string(
-            "Site, place or location of anything."
-        )),
-        ("rdfs:range", "schema:Place"),
-        ("rdfs:range", "dcterms:Location"),
-        ("rdf:type", "rdf:Property")
-    ]:
-        statements = add_if(
-            "mhdb:site",
-            pred[0],
-            pred[1],
-            statements
-        )
+    statements = merge_statements(statements, SITE_VOCABULARY)
 
+    technology_xls = context_workbook(technology_xls, context, "technology")
     mhealthpeople = technology_xls.parse("MHealthPeople")
 
-    for row in mhealthpeople.iterrows():
-        predicates = set()
-        person_iri = check_iri(row[1]["URL"])
-        person_label = language_string(
-            row[1]["MHealthPeople/Labs"]
-        ) if (
-            (
-                len(str(row[1]["MHealthPeople/Labs"]))
-            ) and not (
-                isinstance(
-                    row[1]["MHealthPeople/Labs"],
-                    float
-                )
-            ) and not (
-                str(row[1]["MHealthPeople/Labs"]).startswith("Also")
-            )
-        ) else None
-        person_place = check_iri(row[1]["Site"]) if (
-            len(
-                str(row[1]["Site"]).strip()
-            ) and not (
-                isinstance(
-                    row[1]["Site"],
-                    float
-                )
-            )
-        ) else None
-
-        if person_label:
-            predicates.add(
-                ("rdfs:label", person_label)
-            )
-
-        if person_place:
-            predicates.add(
-                ("mhdb:site", person_place)
-            )
-            statements = add_if(
-                person_place,
-                "rdfs:label",
-                language_string(row[1]["Site"]),
-                statements
-            )
-
-        if "<" in person_iri:
-            predicates.add(
-                ("schema:WebPage", person_iri)
-            )
-
-        if len(predicates):
-            for prop in predicates:
-                statements = add_if(
-                    person_iri,
-                    prop[0],
-                    prop[1],
-                    statements
-                )
-
-        for affiliate_i in range(1, 10):
-            affiliate = "{0}{1}".format(
-                "Affiliate",
-                str(affiliate_i)
-            )
-            if row[1][affiliate] and len(
-                str(row[1][affiliate])
-            ) and not isinstance(
-                row[1][affiliate],
+    people_iris = check_iris(mhealthpeople["URL"]).values
+    rows = np.arange(len(mhealthpeople))
+    labs = mhealthpeople["MHealthPeople/Labs"].astype(object).values
+    has_label = np.array([
+        bool(len(str(lab))) and not isinstance(lab, float) and not str(
+            lab
+        ).startswith("Also") for lab in labs
+    ], dtype=bool)
+    sites = mhealthpeople["Site"].astype(object).values
+    has_site = np.array([
+        bool(len(str(site).strip())) and not isinstance(site, float) for
+        site in sites
+    ], dtype=bool)
+    site_iris = check_iris(sites[has_site])
+    is_webpage = np.array(["<" in iri for iri in people_iris], dtype=bool)
+
+    affiliates = mhealthpeople[[
+        "Affiliate{0}".format(affiliate_i) for affiliate_i in range(1, 10)
+    ]].astype(object).values
+    affiliate_rows, affiliate_columns = np.nonzero(np.array([
+        [
+            bool(affiliate) and bool(len(str(affiliate))) and not isinstance(
+                affiliate,
                 float
-            ):
-                affiliate_iri = check_iri(
-                    row[1][affiliate].split("(")[1].rstrip(")")
-                ) if (
-                    (
-                        "@" in row[1][affiliate]
-                    ) or (
-                        "://" in row[1][affiliate]
-                    )
-                ) else check_iri(", ".join([
-                    " ".join(list(
-                        row[1][affiliate].strip().split(
-                            "("
-                        )[0].split(" ")[1:])).strip(),
-                    row[1][affiliate].strip().split(
-                        "("
-                    )[0].split(" ")[0].strip()
-                ])) if "(" in row[1][affiliate] else check_iri(", ".join([
-                    " ".join(list(
-                        row[1][affiliate].strip().split(" ")[1:])).strip(),
-                    row[1][affiliate].strip().split(" ")[0].strip()
-                ]))
-                affiliate_preds = {
-                    (
-                        property,
-                        language_string(
-                            row[1][affiliate].strip().split(
-                                "("
-                            )[0].strip() if "(" in row[1][
-                                affiliate
-                            ] else row[1][affiliate]
-                        )
-                    ) for property in ["rdfs:label", "foaf:name"]
-                }
-                if "(" in row[1][affiliate]:
-                    if "@" in row[1][affiliate]:
-                        affiliate_preds.add(
-                            (
-                                "schema:email",
-                                check_iri(row[1][affiliate].split(
-                                    "("
-                                )[1].rstrip(")").strip())
-                            )
-                        )
-                    elif "://" in row[1][affiliate]:
-                        affiliate_webpage = row[1][affiliate].split(
-                            "("
-                        )[1].rstrip(")").strip()
-                        affiliate_preds.add(
-                            (
-                                "schema:WebPage",
-                                check_iri(row[1][affiliate].split(
-                                    "("
-                                )[1].rstrip(")").strip())
-                            )
-                        )
-                    elif "lab pup" in row[1][affiliate]:
-                        affiliate_preds.add(
-                            (
-                                "rdfs:comment",
-                                language_string("lab pup")
-                            )
-                        )
-                    else:
-                        affiliate_preds.add(
-                            (
-                                "mhdb:site",
-                                check_iri(
-                                    row[1][affiliate].split(
-                                        "("
-                                    )[1].rstrip(")").strip()
-                                )
-                            )
-                        )
-
-                for pred in affiliate_preds:
-                    statements = add_if(
-                        affiliate_iri,
-                        pred[0],
-                        pred[1],
-                        statements
-                    )
-
-                statements = add_if(
-                    person_iri,
-                    "dcterms:contributor",
-                    affiliate_iri,
-                    statements
-                )
-
-    return(statements)
+            ) for affiliate in row
+        ] for row in affiliates
+    ], dtype=bool).reshape(affiliates.shape))
+    # parse each distinct affiliate once
+    affiliate_codes, distinct_affiliates = pd.factorize(
+        affiliates[affiliate_rows, affiliate_columns]
+    )
+    parsed = parse_affiliates(pd.Series(
+        distinct_affiliates,
+        dtype=object
+    )).iloc[affiliate_codes]
+    affiliate_iris = parsed["iri"].values
+    affiliate_names = language_strings(parsed["name"]).values
+    affiliate_order = 4 + 2 * affiliate_columns
+    extras = [
+        (parsed["email"], "schema:email"),
+        (parsed["url"], "schema:WebPage"),
+        (
+            parsed["note"].map(language_string, na_action="ignore"),
+            "rdfs:comment"
+        ),
+        (parsed["site"], "mhdb:site")
+    ]
+    extra_kinds = [objects.notna().values for objects, _ in extras]
+    extra = np.logical_or.reduce(extra_kinds)
+    extra_predicates = np.select(
+        extra_kinds,
+        [
+            np.full(len(parsed), predicate, dtype=object) for _, predicate in
+            extras
+        ],
+        None
+    )
+    extra_objects = np.select(
+        extra_kinds,
+        [objects.values for objects, _ in extras],
+        None
+    )
+    frames = [
+        statement_frame(
+            rows[has_site],
+            [(site_iris, "rdfs:label", language_strings(pd.Series(
+                sites[has_site],
+                dtype=object
+            )).values)],
+            0
+        ),
+        statement_frame(
+            rows[has_label],
+            [(
+                people_iris[has_label],
+                "rdfs:label",
+                language_strings(pd.Series(labs[has_label], dtype=object))
+                .values
+            )],
+            1
+        ),
+        statement_frame(
+            rows[has_site],
+            [(people_iris[has_site], "mhdb:site", site_iris)],
+            2
+        ),
+        statement_frame(
+            rows[is_webpage],
+            [(people_iris[is_webpage], "schema:WebPage", people_iris[
+                is_webpage
+            ])],
+            3
+        )
+    ]
+    # each affiliate's "rdfs:label", "foaf:name" and any third predicate,
+    # then the person's "dcterms:contributor"
+    for predicate, objects in [
+        ("rdfs:label", affiliate_names),
+        ("foaf:name", affiliate_names)
+    ]:
+        frames.append(statement_frame(
+            affiliate_rows,
+            [(affiliate_iris, predicate, objects)],
+            affiliate_order
+        ))
+    frames.append(statement_frame(
+        affiliate_rows[extra],
+        [(
+            affiliate_iris[extra],
+            extra_predicates[extra],
+            extra_objects[extra]
+        )],
+        affiliate_order[extra]
+    ))
+    frames.append(statement_frame(
+        affiliate_rows,
+        [(
+            people_iris[affiliate_rows],
+            "dcterms:contributor",
+            affiliate_iris
+        )],
+        affiliate_order + 1
+    ))
+    return(add_statement_frames(frames, statements))
 
 
 def object_split_lookup(
@@ -762,7 +1137,8 @@ def object_split_lookup(
     lookup_sheet,
     lookup_key_column,
     lookup_value_column,
-    separator = ","
+    separator = ",",
+    unresolved=None
 ):
     """
     Function to lookup values from comma-separated key columns.
@@ -784,6 +1160,10 @@ def object_split_lookup(
     separator: string
         default=","
 
+    unresolved: list, optional
+        list to extend with (0, key) tuples for keys that could not be
+        resolved
+
     Returns
     -------
     object_iris: list of strings
@@ -805,54 +1185,169 @@ def object_split_lookup(
     ... ))
     [':duck', ':swan']
     """
-    try:
-        if not isinstance(
-            object_indices,
-            float
-        ) and len(str(object_indices).strip()):
-            object_indices = str(object_indices)
-            if separator not in object_indices:
-                object_iris = [check_iri(
-                    lookup_sheet[
-                        lookup_sheet[
-                            lookup_key_column
-                        ] == int(
-                            object_indices
-                        )
-                    ][lookup_value_column].values[0]
-                )] if lookup_sheet[
-                    lookup_sheet[
-                        lookup_key_column
-                    ] == int(
-                        object_indices
-                    )
-                ][lookup_value_column].values.size else None
-            else:
-                object_iris = [
-                    int(
-                        s.strip()
-                    ) for s in object_indices.split(
-                        separator
-                    )
-                ]
-                object_iris = [check_iri(
-                    lookup_sheet[
-                        lookup_sheet[lookup_key_column] == object_i
-                    ][lookup_value_column].values[0]
-                ) for object_i in object_iris]
-            return(object_iris)
-        else:
-            return([])
-    except:
-        print(str(lookup_value_column))
-        print(str(object_indices))
-        return([])
+    return(
+        object_split_lookups(
+            pd.Series([object_indices]),
+            lookup_index(
+                lookup_sheet,
+                lookup_key_column,
+                lookup_value_column
+            ),
+            separator,
+            unresolved
+        )[0]
+    )
+
+
+def object_split_lookups(
+    object_indices,
+    index,
+    separator=",",
+    unresolved=None
+):
+    """
+    Function to resolve a whole column of maybe-separated foreign keys.
+
+    Parameters
+    ----------
+    object_indices: Series
+        column of maybe-separated strings (or numbers) of foreign keys
+
+    index: dictionary
+        output of `lookup_index`
+
+    separator: string
+        default=","
+
+    unresolved: list, optional
+        list to extend with (row label, key) tuples for keys that are not
+        integers or are not in `index`
+
+    Returns
+    -------
+    object_iris: Series
+        lists of Turtle-formatted IRIs (empty lists if none), with the same
+        index as object_indices
+
+    Example
+    -------
+    >>> import numpy as np
+    >>> import pandas as pd
+    >>> unresolved = []
+    >>> print(object_split_lookups(
+    ...     pd.Series(["0, 2", np.nan, 1.0, "2, 5", "duck"]),
+    ...     {0: ":duck", 1: ":goose", 2: ":swan"},
+    ...     unresolved=unresolved
+    ... ).tolist())
+    [[':duck', ':swan'], [], [':goose'], [':swan'], []]
+    >>> print(unresolved)
+    [(3, '5'), (4, 'duck')]
+    """
+    positions = pd.Series(
+        object_indices.values,
+        index=pd.RangeIndex(len(object_indices)),
+        dtype=object
+    )
+    keys = positions.map(
+        lambda value: int_list(value, separator)
+    ).explode().dropna()
+    iris = keys.map(
+        lambda key: index.get(key) if isinstance(key, int) else None
+    )
+    if unresolved is not None:
+        unresolved.extend(
+            (object_indices.index[position], str(key)) for position, key in
+            zip(
+                keys.index[iris.isna()],
+                keys[iris.isna()]
+            )
+        )
+    iris = iris.dropna()
+    object_iris = [[] for position in positions.index]
+    for position, iri in zip(iris.index, iris.values):
+        object_iris[position].append(iri)
+    return(pd.Series(object_iris, index=object_indices.index, dtype=object))
+
+
+def parse_affiliates(affiliates):
+    """
+    Function to parse MHealthPeople "Affiliate{n}" cells, eg,
+    "Surname Given (email, URL, site or 'lab pup')", all at once.
+
+    Parameters
+    ----------
+    affiliates: Series
+        nonempty strings, eg, the melted Affiliate1..Affiliate9 columns
+
+    Returns
+    -------
+    fields: DataFrame
+        same index as affiliates, with columns
+        "name": name before any parenthetical
+        "iri": Turtle-formatted IRI of the affiliate: the parenthetical
+            email or URL, else the name reversed at its first space
+        "email": Turtle-formatted parenthetical email
+        "url": Turtle-formatted parenthetical URL
+        "site": Turtle-formatted parenthetical site
+        "note": parenthetical "lab pup"
+        (missing where not given)
+
+    Example
+    -------
+    >>> import pandas as pd
+    >>> fields = parse_affiliates(pd.Series([
+    ...     "Goose Mother (Gosling U)",
+    ...     "Duck Daffy (daffy@example.com)",
+    ...     "Swan Black"
+    ... ]))
+    >>> print(fields["iri"].tolist())
+    ['mhdb:Mother_Goose', 'mhdb:daffyexamplecom', 'mhdb:Black_Swan']
+    >>> print(fields.loc[0, "name"], fields.loc[0, "site"])
+    Goose Mother mhdb:Gosling_U
+    >>> print(fields.loc[1, "email"], fields["note"].isna().all())
+    mhdb:daffyexamplecom True
+    """
+    affiliates = affiliates.astype(object)
+    parts = affiliates.str.extract(_AFFILIATE_PATTERN).astype(object)
+    first = parts["first"].fillna("")
+    rest = parts["rest"].fillna("")
+    has_parenthetical = parts["parenthetical"].notna()
+    parenthetical = parts["parenthetical"].fillna("").str.rstrip(")")
+    is_email = has_parenthetical & affiliates.str.contains("@", regex=False)
+    is_url = has_parenthetical & ~is_email & affiliates.str.contains(
+        "://",
+        regex=False
+    )
+    is_note = has_parenthetical & ~(is_email | is_url) & \
+        affiliates.str.contains("lab pup", regex=False)
+    is_site = has_parenthetical & ~(is_email | is_url | is_note)
+    parenthetical_iris = pd.Series(
+        check_iris(parenthetical.str.strip()[is_email | is_url | is_site]),
+        dtype=object
+    )
+    fields = pd.DataFrame({
+        "name": (first + (" " + parts["rest"]).fillna("")).str.strip().where(
+            has_parenthetical,
+            affiliates
+        ),
+        "iri": check_iris(parenthetical.where(
+            is_email | is_url,
+            rest.str.strip() + ", " + first.str.strip()
+        )),
+        "email": parenthetical_iris[is_email],
+        "url": parenthetical_iris[is_url],
+        "site": parenthetical_iris[is_site],
+        "note": pd.Series("lab pup", index=affiliates.index)[is_note]
+    }, index=affiliates.index)
+    return(fields.astype(object))
 
 
 def Project(
-    technology_xls,
+    technology_xls=None,
     mentalhealth_xls=None,
-    statements={}
+    statements=None,
+    unresolved=None,
+    context=None
 ):
     '''
     Function to ingest 1cuJXT1Un7HPLYcDyHAXprH-wGS1azuUNmVQnb3dV1cY Project
@@ -874,6 +1369,13 @@ def Project(
             value: {string}
                 set of RDF objects
 
+    unresolved: dictionary, optional
+        dictionary to fill with Project column headers as keys and lists of
+        (row label, foreign key) tuples that could not be resolved as values
+
+    context: WorkbookContext, optional
+        supplies the "technology" and "mentalhealth" workbooks not passed
+
     Returns
     -------
     statements: dictionary
@@ -889,486 +1391,203 @@ def Project(
     -------
     # TODO
     '''
-    for subject in [
-        "schema:Book",
-        "schema:Article"
-    ]:
-        statements = add_if(
-            subject,
-            "rdfs:subClassOf",
-            "mhdb:BookOrArticle",
-            statements
-        )
-
-    for pred in [
-        ("rdfs:subClassOf", "schema:CreativeWork"),
-        ("rdfs:subClassOf", "dcterms:BibliographicResource"),
-        ("rdfs:label", language_string("Book / Article"))
-    ]:
-        statements = add_if(
-            "mhdb:BookOrArticle",
-            pred[0],
-            pred[1],
-            statements
-        )
-
-    for pred in [
-        ("rdfs:subClassOf", "schema:CreativeWork"),
-        ("rdfs:subClassOf", "schema:MedicalTest"),
-        ("rdfs:label", language_string("Assessment"))
-    ]:
-        statements = add_if(
-            "mhdb:Assessment",
-            pred[0],
-            pred[1],
-            statements
-        )
-
-    for pred in [
-        ("rdfs:subClassOf", "schema:CreativeWork"),
-        ("rdfs:subClassOf", "dcterms:InteractiveResource"),
-        ("rdfs:label", language_string("Virtual Reality"))
-    ]:
-        statements = add_if(
-            "mhdb:VirtualReality",
-            pred[0],
-            pred[1],
-            statements
-        )
-
-    for pred in [
-        ("rdfs:subClassOf", "schema:CreativeWork"),
-        ("rdfs:subClassOf", "dcterms:InteractiveResource"),
-        ("rdfs:label", language_string("Augmented Reality"))
-    ]:
-        statements = add_if(
-            "mhdb:AugmentedReality",
-            pred[0],
-            pred[1],
-            statements
-        )
-
-    for pred in [
-        ("rdfs:subClassOf", "schema:Book"),
-        ("rdfs:label", language_string("Resource Guide"))
-    ]:
-        statements = add_if(
-            "mhdb:ResourceGuide",
-            pred[0],
-            pred[1],
-            statements
-        )
+    statements = merge_statements(statements, PROJECT_VOCABULARY)
 
-    for pred in [
-        ("rdfs:subClassOf", "schema:Service"),
-        ("rdfs:subClassOf", "schema:OrganizeAction"),
-        ("rdfs:label", language_string("Community Initiative"))
-    ]:
-        statements = add_if(
-            "mhdb:CommunityInitiative",
-            pred[0],
-            pred[1],
-            statements
-        )
-
-    for pred in [
-        ("rdfs:subClassOf", "ssn:Device"),
-        ("rdfs:comment", language_string(
-            "A smart electronic device (electronic device with "
-            "micro-controller(s)) that can be worn on the body as implants or "
-            "accessories."
-        )),
-        ("rdfs:isDefinedBy", check_iri(
-            "https://en.wikipedia.org/wiki/Wearable_technology"
-        )),
-        ("rdfs:label", language_string("Wearable"))
-    ]:
-        statements = add_if(
-            "mhdb:Wearable",
-            pred[0],
-            pred[1],
-            statements
+    technology_xls = context_workbook(technology_xls, context, "technology")
+    mentalhealth_xls = context_workbook(
+        mentalhealth_xls,
+        context,
+        "mentalhealth"
+    )
+    project = technology_xls.parse("Project", convert_float=False)
+    homepage = technology_xls.parse("HomePageLink")
+    type_of_project = technology_xls.parse("TypeOfProject")
+    mhealthpeople = technology_xls.parse("MHealthPeople")
+    research_study = technology_xls.parse("ResearchStudyOnProject")
+    disorders = disorder_lookup(
+        mentalhealth_xls,
+        pre_specifiers_indices=[
+            6,
+            7,
+            24,
+            25,
+            26
+        ],
+        post_specifiers_indices=[
+            27,
+            28,
+            56,
+            78
+        ]
+    )
+    lookups = {}
+    for column, lookup_sheet, lookup_value_column in [
+        ("HomePageLink_index", homepage, "HomePageLink"),
+        ("TypeOfProject_index", type_of_project, "IRI"),
+        ("MHealthPeople_index", mhealthpeople, "URL"),
+        (
+            "ResearchStudyOnProjectLink_index",
+            research_study,
+            "ResearchStudyOnProjectLink"
         )
-
-        for pred in [
-            ("rdfs:subClassOf", "ssn:Device"),
-            ("rdfs:label", language_string("Tablet"))
-        ]:
-            statements = add_if(
-                "mhdb:Tablet",
-                pred[0],
-                pred[1],
-                statements
-            )
-
-    for pred in [
-        ("rdfs:subClassOf", "schema:Game"),
-        ("owl:disjointWith", "schema:VideoGame"),
-        ("rdfs:label", language_string("Non-Digital Game"))
     ]:
-        statements = add_if(
-            "mhdb:NonDigitalGame",
-            pred[0],
-            pred[1],
-            statements
+        column_unresolved = [] if unresolved is not None else None
+        lookups[column] = object_split_lookups(
+            project[column],
+            lookup_index(
+                lookup_sheet,
+                "index",
+                lookup_value_column
+            ),
+            ",",
+            column_unresolved
         )
-
-    statements = {
-        **doi_iri(
-            "10.1109/IEEESTD.2015.7084073",
-            "1872-2015 - IEEE Standard Ontologies for Robotics and Automation"
+        if column_unresolved:
+            unresolved[column] = column_unresolved
+
+    named = project["project"].notna().values
+    rows = np.arange(len(project))[named]
+    project_iris = pd.Series(
+        check_iris(project["project"][named]).values,
+        index=rows
+    )
+    project_labels = language_strings(project["project"][named]).values
+
+    def exploded(values):
+        return(pd.Series(list(values[named]), index=rows).explode().dropna())
+
+    disorder_keys = exploded(project["disorder_index"].map(int_list).values)
+    disorder_rows = disorders.loc[list(disorder_keys)]
+    homepage_iris = exploded(lookups["HomePageLink_index"].values)
+    type_of_project_iris = exploded(lookups["TypeOfProject_index"].values)
+    mhealthpeople_iris = exploded(lookups["MHealthPeople_index"].values)
+    study_iris = exploded(lookups["ResearchStudyOnProjectLink_index"].values)
+
+    return(add_statement_frames([
+        statement_frame(
+            disorder_keys.index,
+            [
+                (
+                    disorder_rows["IRI"].values,
+                    "rdfs:label",
+                    disorder_rows["label"].values
+                ),
+                (
+                    project_iris[disorder_keys.index].values,
+                    "dcterms:subject",
+                    disorder_rows["IRI"].values
+                )
+            ],
+            0
         ),
-        **statements
-    }
-
-    for pred in [
-        ("rdfs:subClassOf", "dcterms:Agent"),
-        ("rdfs:subClassOf", "ssn:Device"),
-        (
-            "dcterms:source",
-            check_iri(
-                'https://dx.doi.org/10.1109/IEEESTD.2015.7084073'
-            )
+        statement_frame(
+            homepage_iris.index,
+            [
+                (
+                    homepage_iris.values,
+                    "schema:about",
+                    project_iris[homepage_iris.index].values
+                ),
+                (homepage_iris.values, "rdf:type", "schema:WebPage")
+            ],
+            1
         ),
-        ("rdfs:label", language_string("Robot")),
-        (
-            "rdfs:comment",
-            language_string(
-                "An agentive device (Agent and Device in SUMO) in a broad "
-                "sense, purposed to act in the physical world in order to "
-                "accomplish one or more tasks. In some cases, the actions of a "
-                "robot might be subordinated to actions of other agents (Agent "
-                "in SUMO), such as software agents (bots) or humans. A robot "
-                "is composed of suitable mechanical and electronic parts. "
-                "Robots might form social groups, where they interact to "
-                "achieve a common goal. A robot (or a group of robots) can "
-                "form robotic systems together with special environments "
-                "geared to facilitate their work."
-            )
-        )
-    ]:
-        statements = add_if(
-            "mhdb:Robot",
-            pred[0],
-            pred[1],
-            statements
-        )
-
-    for pred in [
-        ("rdfs:subClassOf", "schema:CreativeWork"),
-        (
-            "dcterms:source",
-            check_iri(
-                "http://afirm.fpg.unc.edu/social-narratives"
-            )
+        statement_frame(
+            type_of_project_iris.index,
+            [(
+                project_iris[type_of_project_iris.index].values,
+                "rdf:type",
+                type_of_project_iris.values
+            )],
+            2
         ),
-        (
-            "rdfs:isDefinedBy",
-            check_iri(
-                "http://afirm.fpg.unc.edu/social-narratives"
-            )
+        statement_frame(
+            mhealthpeople_iris.index,
+            [(
+                project_iris[mhealthpeople_iris.index].values,
+                "dcterms:contributor",
+                mhealthpeople_iris.values
+            )],
+            3
         ),
-        (
-            "rdfs:comment",
-            language_string(
-                "Social narratives (SN) describe social situations for "
-                "learners by providing relevant cues, explanation of the "
-                "feelings and thoughts of others, and descriptions of "
-                "appropriate behavior expectations."
-            )
+        statement_frame(
+            study_iris.index,
+            [
+                (
+                    study_iris.values,
+                    "schema:about",
+                    project_iris[study_iris.index].values
+                ),
+                (study_iris.values, "rdf:type", "schema:ScholarlyArticle")
+            ],
+            4
         ),
-        ("rdfs:label", language_string("Social Narrative"))
-    ]:
-        statements = add_if(
-            "mhdb:SocialNarrative",
-            pred[0],
-            pred[1],
-            statements
-        )
-
-    for pred in [
-        ("rdfs:label", language_string("Ann M. Sam")),
-        ("foaf:name", language_string("Ann M. Sam")),
-        ("foaf:familyName", language_string("Sam")),
-        ("foaf:givenName", language_string("Ann")),
-        ("rdfs:type", "foaf:Person"),
-        ("rdfs:site", "mhdb:University_of_North_Carolina_at_Chapel_Hill")
-    ]:
-        statements = add_if(
-            check_iri("http://fpg.unc.edu/profiles/ann-m-sam"),
-            pred[0],
-            pred[1],
-            statements
-        )
-
-    for pred in [
-        ("rdfs:label", language_string("AFIRM Team")),
-        ("foaf:name", language_string("AFIRM Team")),
-        ("rdfs:type", "foaf:Organization"),
-        ("rdfs:site", "mhdb:University_of_North_Carolina_at_Chapel_Hill")
-    ]:
-        statements = add_if(
-            check_iri("AFIRM Team"),
-            pred[0],
-            pred[1],
-            statements
-        )
-
-    for contributor in [
-        check_iri("http://fpg.unc.edu/profiles/ann-m-sam"),
-        check_iri("AFIRM Team")
-    ]:
-        statements = add_if(
-            check_iri(
-                "http://afirm.fpg.unc.edu/social-narratives"
-            ),
-            "dcterms:contributor",
-            contributor,
-            statements
-        )
-
-    for pred in [
-        ("rdfs:subClassOf", "mhdb:SocialNarrative"),
-        ("rdfs:subClassOf", "schema:Game"),
-        (
-            "rdfs:label",
-            language_string(
-                "Combination of a Social Narrative and Gaming System"
-            )
-        )
-    ]:
-        statements = add_if(
-            "mhdb:SocialNarrativeGamingSystem",
-            pred[0],
-            pred[1],
-            statements
-        )
-
-    for pred in [
-        ("rdfs:subClassOf", "sio:SIO_001066"),
-        ("schema:participant", "schema:ParentAudience")
-    ]:
-        statements = add_if(
-            "mhdb:StudyWithParents",
-            pred[0],
-            pred[1],
-            statements
-        )
-
-    for pred in [
-        ("rdfs:label", language_string("Competition")),
-        ("rdfs:subClassOf", "schema:Event")
-    ]:
-        statements = add_if(
-            "mhdb:Competition",
-            pred[0],
-            pred[1],
-            statements
-        )
-
-    for pred in [
-        ("rdfs:label", language_string("Science Contest")),
-        ("rdfs:subClassOf", "mhdb:Competition")
-    ]:
-        statements = add_if(
-            "mhdb:ScienceContest",
-            pred[0],
-            pred[1],
-            statements
-        )
-
-    for pred in [
-        ("rdfs:label", language_string("Massive Open Online Course")),
-        ("rdfs:subClassOf", "schema:Course")
-    ]:
-        statements = add_if(
-            "mhdb:MOOC",
-            pred[0],
-            pred[1],
-            statements
+        statement_frame(
+            rows,
+            [
+                (project_iris.values, "rdfs:label", project_labels),
+                (project_iris.values, "rdfs:subClassOf", "schema:Product")
+            ],
+            5
         )
+    ], statements))
 
-    #TODO: define Toy, StudentProject, Hackathon, OutreachProgram, SupportGroup
-
-    project = technology_xls.parse("Project", convert_float=False)
-    homepage = technology_xls.parse("HomePageLink")
-    type_of_project = technology_xls.parse("TypeOfProject")
-    mhealthpeople = technology_xls.parse("MHealthPeople")
-    research_study = technology_xls.parse("ResearchStudyOnProject")
 
-    for row in project.iterrows():
-        if isinstance(
-            row[1]["project"],
-            float
-        ) and np.isnan(row[1]["project"]):
-            continue
-        project_iri = check_iri(row[1]["project"])
-        project_label = language_string(row[1]["project"])
-
-        disorder_iris = [
-            int(
-                disorder_index.strip()
-            ) for disorder_index in row[1][
-                "disorder_index"
-            ].split(",")
-        ] if (
-            (
-                isinstance(
-                    row[1][
-                        "disorder_index"
-                    ],
-                    str
-                )
-            ) and (
-                "," in row[1][
-                    "disorder_index"
-                ]
-            )
-        ) else [
-            int(row[1][
-                "disorder_index"
-            ])
-        ] if (
-            not isinstance(
-                row[1]["disorder_index"],
-                float
-            ) or (
-                not np.isnan(
-                    row[1][
-                        "disorder_index"
-                    ]
-                )
-            )
-        ) else None
-
-        homepage_iris = object_split_lookup(
-            row[1]["HomePageLink_index"],
-            homepage,
-            "index",
-            "HomePageLink",
-            ","
-        )
-
-        type_of_project_iris = object_split_lookup(
-            row[1]["TypeOfProject_index"],
-            type_of_project,
-            "index",
-            "IRI",
-            ","
-        )
+def statement_frame(rows, statements, order=0):
+    """
+    Function to build the same statements for many items at once.
 
-        mhealthpeople_iris = object_split_lookup(
-            row[1]["MHealthPeople_index"],
-            mhealthpeople,
-            "index",
-            "URL",
-            ","
-        )
+    Parameters
+    ----------
+    rows: array of ints
+        sheet row position of each item
 
-        study_iris = object_split_lookup(
-            row[1]["ResearchStudyOnProjectLink_index"],
-            research_study,
-            "index",
-            "ResearchStudyOnProjectLink",
-            ","
-        )
-        disorder_statements = {}
-        if disorder_iris and len(disorder_iris):
-            for disorder in disorder_iris:
-                disorder_statements = disorder_iri(
-                    disorder,
-                    mentalhealth_xls=mentalhealth_xls,
-                    pre_specifiers_indices=[
-                        6,
-                        7,
-                        24,
-                        25,
-                        26
-                    ],
-                    post_specifiers_indices=[
-                        27,
-                        28,
-                        56,
-                        78
-                    ]
-                )
-                statements = add_if(
-                    project_iri,
-                    "dcterms:subject",
-                    [
-                        k for k in disorder_statements
-                    ][0],
-                    {
-                        **statements,
-                        **disorder_statements
-                    }
-                )
+    statements: list of 3-tuples
+        (subject, predicate, object) made for every item, in order; each
+        term is an array with one value per item or a single value for
+        all items
 
-        if homepage_iris and len(homepage_iris):
-            for homepage_iri in homepage_iris:
-                for prop in [
-                    ("schema:about", project_iri),
-                    ("rdf:type", "schema:WebPage")
-                ]:
-                    statements = add_if(
-                        homepage_iri,
-                        prop[0],
-                        prop[1],
-                        statements
-                    )
-
-        if type_of_project_iris and len(type_of_project_iris):
-            for type_of_project_iri in type_of_project_iris:
-                statements = add_if(
-                    project_iri,
-                    "rdf:type",
-                    type_of_project_iri,
-                    statements
-                )
+    order: int or array of ints, optional
+        order of these statements among the other statements made for a
+        row, for all items or per item
 
-        if mhealthpeople_iris and len(mhealthpeople_iris):
-            for mhealthpeople_iri in mhealthpeople_iris:
-                for prop in [
-                    ("dcterms:contributor", mhealthpeople_iri)
-                ]:
-                    statements = add_if(
-                        project_iri,
-                        prop[0],
-                        prop[1],
-                        statements
-                    )
-
-        if study_iris and len(study_iris):
-            for study_iri in study_iris:
-                for prop in [
-                    ("schema:about", project_iri),
-                    ("rdf:type", "schema:ScholarlyArticle")
-                ]:
-                    statements = add_if(
-                        study_iri,
-                        prop[0],
-                        prop[1],
-                        statements
-                    )
-
-        for prop in [
-            ("rdfs:label", project_label),
-            ("rdfs:subClassOf", "schema:Product")
-        ]:
-            statements = add_if(
-                project_iri,
-                prop[0],
-                prop[1],
-                statements
-            )
+    Returns
+    -------
+    frame: DataFrame
+        columns "row", "order", "subject", "predicate" and "object"; for
+        each item in turn, one row per statement
 
-    return(statements)
+    Example
+    -------
+    >>> for triple in statement_frame(
+    ...     [0, 0],
+    ...     [(["goose", "duck"], ":is", ":bird"), (":bird", ":has", ":wings")]
+    ... )[["subject", "predicate", "object"]].values.tolist():
+    ...     print(triple)
+    ['goose', ':is', ':bird']
+    [':bird', ':has', ':wings']
+    ['duck', ':is', ':bird']
+    [':bird', ':has', ':wings']
+    """
+    rows = np.asarray(rows)
+    count = len(statements)
+    frame = {
+        "row": np.repeat(rows, count),
+        "order": np.repeat(np.broadcast_to(order, rows.shape), count)
+    }
+    for position, term in enumerate(["subject", "predicate", "object"]):
+        values = np.empty((len(rows), count), dtype=object)
+        for i, statement in enumerate(statements):
+            values[:, i] = statement[position]
+        frame[term] = pd.Series(values.ravel(), dtype=object)
+    return(pd.DataFrame(frame))
 
 
 def technology(
-    technology_xls,
+    technology_xls=None,
     mentalhealth_xls=None,
-    statements={}
+    statements=None,
+    context=None
 ):
     '''
     Function to ingest 1cuJXT1Un7HPLYcDyHAXprH-wGS1azuUNmVQnb3dV1cY workbook
@@ -1390,6 +1609,9 @@ def technology(
             value: {string}
                 set of RDF objects
 
+    context: WorkbookContext, optional
+        supplies the "technology" and "mentalhealth" workbooks not passed
+
     Returns
     -------
     statements: dictionary
@@ -1405,13 +1627,24 @@ def technology(
     -------
     # TODO
     '''
+    if context is None:
+        context = WorkbookContext({
+            name: workbook for name, workbook in [
+                ("technology", technology_xls),
+                ("mentalhealth", mentalhealth_xls)
+            ] if workbook is not None
+        })
+        technology_xls = None
+        mentalhealth_xls = None
     return(
         Project(
             technology_xls,
             mentalhealth_xls,
             MHealthPeople(
                 technology_xls,
-                statements
-            )
+                statements,
+                context=context
+            ),
+            context=context
         )
     )
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+This program contains functions to open output files as text streams that
+compress (gzip or zstd) as they are written.
+
+Copyright 2018, Child Mind Institute (http://childmind.org), Apache v2.0 License
+
+"""
+import gzip
+
+# file name suffix of each supported compression
+COMPRESSION_SUFFIXES = {
+    "gzip": ".gz",
+    "zstd": ".zst"
+}
+
+
+def compressed_path(path, compression=None):
+    """
+    Function to add a compression's file name suffix to a path.
+
+    Parameters
+    ----------
+    path: string
+
+    compression: string, optional
+        "gzip", "zstd" or None
+
+    Returns
+    -------
+    path: string
+
+    Example
+    -------
+    >>> print(compressed_path("behavior.ttl", "gzip"))
+    behavior.ttl.gz
+    >>> print(compressed_path("behavior.ttl.gz", "gzip"))
+    behavior.ttl.gz
+    """
+    if compression is None:
+        return(path)
+    suffix = COMPRESSION_SUFFIXES.get(compression)
+    if suffix is None:
+        raise Exception(
+            "Unknown compression \"{0}\"; expected one of {1}".format(
+                compression,
+                ", ".join(COMPRESSION_SUFFIXES)
+            )
+        )
+    return(path if path.endswith(suffix) else "".join([path, suffix]))
+
+
+def infer_compression(path):
+    """
+    Function to infer a compression from a path's file name suffix.
+
+    Parameters
+    ----------
+    path: string
+
+    Returns
+    -------
+    compression: string or None
+        "gzip", "zstd" or None
+
+    Example
+    -------
+    >>> print(infer_compression("behavior.ttl.zst"), infer_compression("dsm.ttl"))
+    zstd None
+    """
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if path.endswith(suffix):
+            return(compression)
+    return(None)
+
+
+def open_output(path, compression="infer", level=None):
+    """
+    Function to open a UTF-8 text file for writing, compressing what is
+    written to it as it is written, so no uncompressed copy is kept in
+    memory or on disk.
+
+    gzip is built in. zstd uses the standard library's compression.zstd
+    module if there is one, else the optional "zstandard" package.
+
+    Parameters
+    ----------
+    path: string
+
+    compression: string, optional
+        "gzip", "zstd", None for none, or "infer" (default) to infer from
+        path's file name suffix
+
+    level: int, optional
+        compression level, default the compressor's default
+
+    Returns
+    -------
+    fid: file-like object
+        writable text stream; close it (or use it as a context manager)
+        to finish the compressed file
+
+    Example
+    -------
+    >>> import gzip
+    >>> import os
+    >>> import tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), "goose.ttl.gz")
+    >>> with open_output(path) as fid:
+    ...     _ = fid.write("mhdb:goose mhdb:chases mhdb:it .")
+    >>> with gzip.open(path, "rt") as fid:
+    ...     print(fid.read())
+    mhdb:goose mhdb:chases mhdb:it .
+    """
+    if compression == "infer":
+        compression = infer_compression(path)
+    if compression is None:
+        return(open(path, "w", encoding="utf-8"))
+    elif compression == "gzip":
+        return(gzip.open(
+            path,
+            "wt",
+            compresslevel=9 if level is None else level,
+            encoding="utf-8"
+        ))
+    elif compression == "zstd":
+        try:
+            from compression import zstd
+            return(zstd.open(path, "wt", level=level, encoding="utf-8"))
+        except ImportError:
+            pass
+        try:
+            import zstandard
+        except ImportError:
+            raise Exception(
+                "zstd compression needs Python 3.14 or the \"zstandard\" "
+                "package (pip install zstandard)"
+            )
+        return(zstandard.open(
+            path,
+            "wt",
+            cctx=zstandard.ZstdCompressor(
+                level=3 if level is None else level
+            ),
+            encoding="utf-8"
+        ))
+    raise Exception("Unknown compression \"{0}\"; expected one of {1}".format(
+        compression,
+        ", ".join(COMPRESSION_SUFFIXES)
+    ))
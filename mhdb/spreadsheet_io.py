@@ -10,14 +10,55 @@ Authors:
 Copyright 2017, Child Mind Institute (http://childmind.org), Apache v2.0 License
 
 """
+import hashlib
+import http.client
+import json
 import os
 import pandas as pd
-import urllib
+import shutil
+import threading
+import time
+import urllib.error
+import urllib.parse
+from concurrent.futures import as_completed, ThreadPoolExecutor
+from functools import lru_cache
+try:
+    from mhdb.workbook import file_hash
+except:
+    from mhdb.mhdb.workbook import file_hash
+
+_connections = threading.local()
+
+class _LabelTable(dict):
+    """
+    str.translate table that keeps alphanumeric characters, "-" and "_"
+    and deletes everything else. ASCII code points are filled in up front;
+    other code points are classified with str.isalnum on first use.
+    """
+    def __init__(self):
+        super().__init__(
+            (i, self._classify(i)) for i in range(128)
+        )
+
+    def __missing__(self, code_point):
+        self[code_point] = self._classify(code_point)
+        return(self[code_point])
+
+    @staticmethod
+    def _classify(code_point):
+        c = chr(code_point)
+        return(code_point if (c.isalnum() or c in "-_") else None)
+
+
+_label_table = _LabelTable()
+
 
 def convert_string_to_label(input_string):
     """
     Remove all non-alphanumeric characters from a string.
 
+    Results are memoized; see label_cache_info.
+
     Parameters
     ----------
     input_string : string
@@ -28,20 +69,89 @@ def convert_string_to_label(input_string):
     output_string : string
         output string
 
+    Example
+    -------
+    >>> print(convert_string_to_label(" Goose - chases (it)! "))
+    Goose-chases_it
+    >>> print(convert_string_to_label("café au lait"))
+    café_au_lait
     """
-
     if input_string and isinstance(input_string, str):
-        #input_string = input_string.lower()
-        input_string = input_string.strip()
-        input_string = input_string.replace(" ", "_")
-        input_string = input_string.replace("_-_", "-")
-        keep_chars = ('-', '_')
-        output_string = "".join(c for c in str(input_string) if c.isalnum()
-                                or c in keep_chars).rstrip()
-        return output_string
+        return(_convert_string_to_label(input_string))
     else:
         raise Exception('"{0}" is not a string!'.format(input_string))
 
+
+@lru_cache(maxsize=1 << 16)
+def _convert_string_to_label(input_string):
+    return(input_string.strip().replace(" ", "_").replace(
+        "_-_",
+        "-"
+    ).translate(_label_table))
+
+
+def convert_strings_to_labels(series):
+    """
+    Remove all non-alphanumeric characters from each string in a Series,
+    as convert_string_to_label does for one string.
+
+    Parameters
+    ----------
+    series : Series
+
+    Returns
+    -------
+    labels : Series
+        same index as series; NaN for values that are not nonempty strings
+
+    Example
+    -------
+    >>> import pandas as pd
+    >>> labels = convert_strings_to_labels(pd.Series(
+    ...     [" Goose - chases (it)! ", "café au lait", None, 3]
+    ... ))
+    >>> print(list(labels.fillna("")))
+    ['Goose-chases_it', 'café_au_lait', '', '']
+    """
+    strings = series.where(series.map(
+        lambda x: isinstance(x, str) and bool(x)
+    )).astype(object)
+    return(
+        strings.str.strip().str.replace(
+            " ",
+            "_",
+            regex=False
+        ).str.replace(
+            "_-_",
+            "-",
+            regex=False
+        ).str.replace(
+            r"[^\w-]",
+            "",
+            regex=True
+        )
+    )
+
+
+def label_cache_info():
+    """
+    Function to return convert_string_to_label's memo statistics.
+
+    Returns
+    -------
+    cache_info : functools._CacheInfo
+        named tuple of hits, misses, maxsize and currsize
+
+    Example
+    -------
+    >>> before = label_cache_info()
+    >>> labels = [convert_string_to_label("honk honk") for i in range(3)]
+    >>> after = label_cache_info()
+    >>> print(after.hits - before.hits >= 2, after.maxsize)
+    True 65536
+    """
+    return(_convert_string_to_label.cache_info())
+
 # def create_uri(base_uri, label):
 #     """
 #     Create a safe URI.
@@ -102,30 +212,490 @@ def convert_string_to_label(input_string):
 #     return output_triple
 
 
-def download_google_sheet(filepath, docid):
+def download_google_sheet(
+    filepath,
+    docid,
+    url=None,
+    mirror=None,
+    offline=None
+):
     """
     Download latest version of a Google Sheet
 
+    The request is conditional: ETag and Last-Modified validators and the
+    SHA-256 digest of the last download are kept in a "<filepath>.json"
+    sidecar file, so an unchanged sheet costs a "304 Not Modified" and
+    identical content is never rewritten (keeping the on-disk parse cache
+    of mhdb.workbook warm).
+
     Parameters
     ----------
     filepath : string
 
     docid : string
 
+    url : string, optional
+        URL to download from, default the Google Sheets xlsx export URL
+        for docid
+
+    mirror : string, optional
+        directory of local copies named "<docid>.xlsx"; updated after each
+        download and served from when offline, default the MHDB_MIRROR
+        environment variable
+
+    offline : Boolean, optional
+        copy from mirror (or keep filepath) instead of downloading, default
+        True if the MHDB_OFFLINE environment variable is set
+
     Returns
     -------
     filepath : sting
+
+    Example
+    -------
+    >>> import os
+    >>> import tempfile
+    >>> import threading
+    >>> from http.server import BaseHTTPRequestHandler, HTTPServer
+    >>> class Handler(BaseHTTPRequestHandler):
+    ...     statuses = []
+    ...     def do_GET(self):
+    ...         if self.headers.get("If-None-Match") == '"v1"':
+    ...             Handler.statuses.append(304)
+    ...             self.send_response(304)
+    ...             self.end_headers()
+    ...         else:
+    ...             Handler.statuses.append(200)
+    ...             self.send_response(200)
+    ...             self.send_header("ETag", '"v1"')
+    ...             self.send_header("Content-Length", "5")
+    ...             self.end_headers()
+    ...             self.wfile.write(b"honk!")
+    ...     def log_message(self, *args):
+    ...         pass
+    >>> server = HTTPServer(("127.0.0.1", 0), Handler)
+    >>> thread = threading.Thread(target=server.serve_forever, daemon=True)
+    >>> thread.start()
+    >>> url = "http://127.0.0.1:{0}/goose".format(server.server_port)
+    >>> directory = tempfile.mkdtemp()
+    >>> filepath = os.path.join(directory, "data", "goose.xlsx")
+    >>> mirror = os.path.join(directory, "mirror")
+    >>> for run in range(2):
+    ...     _ = download_google_sheet(filepath, "goose", url, mirror, False)
+    >>> print(Handler.statuses)
+    [200, 304]
+    >>> server.shutdown()
+    >>> server.server_close()
+    >>> os.remove(filepath)
+    >>> filepath = download_google_sheet(filepath, "goose", url, mirror, True)
+    >>> print(open(filepath).read())
+    honk!
     """
+    if offline is None:
+        offline = bool(os.environ.get("MHDB_OFFLINE"))
+    if mirror is None:
+        mirror = os.environ.get("MHDB_MIRROR")
     if not os.path.exists(os.path.abspath(os.path.dirname(filepath))):
         os.makedirs(os.path.abspath(os.path.dirname(filepath)))
-    urllib.request.urlretrieve("{1}{0}{2}".format(
+    mirror_path = os.path.join(
+        mirror,
+        "{0}.xlsx".format(docid)
+    ) if mirror else None
+    if offline:
+        if mirror_path and os.path.exists(mirror_path):
+            if not (
+                os.path.exists(filepath) and
+                file_hash(filepath) == file_hash(mirror_path)
+            ):
+                shutil.copyfile(mirror_path, filepath)
+        elif not os.path.exists(filepath):
+            raise Exception(
+                'Offline and no local copy of "{0}"'.format(docid)
+            )
+        return(filepath)
+    url = url if url else "{1}{0}{2}".format(
         docid,
         'https://docs.google.com/spreadsheets/d/',
         '/export?format=xlsx'
-        ), filepath)
+    )
+    sidecar = "{0}.json".format(filepath)
+    validators = {}
+    if os.path.exists(sidecar) and os.path.exists(filepath):
+        try:
+            with open(sidecar, "r") as fid:
+                validators = json.load(fid)
+        except (OSError, ValueError):
+            validators = {}
+        if validators.get("url") != url or validators.get(
+            "sha256"
+        ) != file_hash(filepath):
+            validators = {}
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    response, location = _get(url, headers)
+    if response.status == 304:
+        response.read()
+        if validators:
+            _mirror_copy(filepath, mirror_path)
+            return(filepath)
+    if response.status != 200:
+        response.read()
+        raise urllib.error.HTTPError(
+            location,
+            response.status,
+            response.reason,
+            response.headers,
+            None
+        )
+    temporary_path = "{0}.{1}.{2}.tmp".format(
+        filepath,
+        os.getpid(),
+        threading.get_ident()
+    )
+    digest = hashlib.sha256()
+    with open(temporary_path, "wb") as fid:
+        for block in iter(lambda: response.read(1 << 16), b""):
+            digest.update(block)
+            fid.write(block)
+    digest = digest.hexdigest()
+    if digest == validators.get("sha256"):
+        os.remove(temporary_path)
+    else:
+        os.replace(temporary_path, filepath)
+    validators = {
+        "url": url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "sha256": digest
+    }
+    with open(sidecar, "w") as fid:
+        json.dump(validators, fid, indent=2, sort_keys=True)
+    _mirror_copy(filepath, mirror_path)
     return(filepath)
 
 
+def download_google_sheets(
+    sheets,
+    max_workers=4,
+    retries=3,
+    backoff=0.5,
+    fallback=False,
+    urls=None,
+    mirror=None,
+    offline=None
+):
+    """
+    Download several Google Sheets concurrently, returning once every file
+    is on disk.
+
+    Each worker thread reuses its own keep-alive connections, and
+    transient failures (connection errors, HTTP 429 and 5xx) are retried
+    with exponential backoff.
+
+    Parameters
+    ----------
+    sheets : dictionary
+        key : string
+            docid
+        value : string
+            filepath
+
+    max_workers : int, optional
+        maximum number of concurrent downloads
+
+    retries : int, optional
+        number of retries of a transient failure
+
+    backoff : float, optional
+        seconds to wait before the first retry, doubled for each retry
+
+    fallback : Boolean, optional
+        if a download fails, keep an existing local copy instead of raising
+
+    urls : dictionary, optional
+        key : string
+            docid
+        value : string
+            URL to download from instead of the Google Sheets export URL
+
+    mirror : string, optional
+        see download_google_sheet
+
+    offline : Boolean, optional
+        see download_google_sheet
+
+    Returns
+    -------
+    filepaths : dictionary
+        key : string
+            docid
+        value : string
+            filepath
+
+    Example
+    -------
+    >>> import os
+    >>> import tempfile
+    >>> import threading
+    >>> from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    >>> class Handler(BaseHTTPRequestHandler):
+    ...     protocol_version = "HTTP/1.1"
+    ...     lock = threading.Lock()
+    ...     barrier = threading.Barrier(3, timeout=10)
+    ...     requests = []
+    ...     in_flight = 0
+    ...     max_in_flight = 0
+    ...     def do_GET(self):
+    ...         with Handler.lock:
+    ...             Handler.requests.append((self.path, self.client_address))
+    ...             attempts = [
+    ...                 path for path, client in Handler.requests
+    ...             ].count(self.path)
+    ...         if self.path == "/moved":
+    ...             self.send_response(302)
+    ...             self.send_header("Location", "/goose")
+    ...         elif self.path == "/flaky" and attempts == 1:
+    ...             self.send_response(503)
+    ...         else:
+    ...             with Handler.lock:
+    ...                 Handler.in_flight += 1
+    ...                 Handler.max_in_flight = max(
+    ...                     Handler.max_in_flight,
+    ...                     Handler.in_flight
+    ...                 )
+    ...             try:
+    ...                 # hold each download until all three are in flight
+    ...                 Handler.barrier.wait()
+    ...             except threading.BrokenBarrierError:
+    ...                 pass
+    ...             with Handler.lock:
+    ...                 Handler.in_flight -= 1
+    ...             self.send_response(200)
+    ...             self.send_header("Content-Length", "5")
+    ...             self.end_headers()
+    ...             self.wfile.write(b"honk!")
+    ...             return
+    ...         self.send_header("Content-Length", "0")
+    ...         self.end_headers()
+    ...     def log_message(self, *args):
+    ...         pass
+    >>> server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    >>> server.daemon_threads = True
+    >>> threading.Thread(target=server.serve_forever, daemon=True).start()
+    >>> root = "http://127.0.0.1:{0}/".format(server.server_port)
+    >>> directory = tempfile.mkdtemp()
+    >>> sheets = {
+    ...     docid: os.path.join(directory, "{0}.xlsx".format(docid)) for
+    ...     docid in ["goose", "moved", "flaky"]
+    ... }
+    >>> filepaths = download_google_sheets(
+    ...     sheets,
+    ...     backoff=0.01,
+    ...     urls={docid: root + docid for docid in sheets}
+    ... )
+    >>> print(sorted(filepaths), open(filepaths["moved"]).read())
+    ['flaky', 'goose', 'moved'] honk!
+    >>> print(Handler.max_in_flight, Handler.barrier.broken)
+    3 False
+    >>> print(sorted(path for path, client in Handler.requests))
+    ['/flaky', '/flaky', '/goose', '/goose', '/moved']
+    >>> print(len({client for path, client in Handler.requests}))
+    3
+    >>> server.shutdown()
+    >>> server.server_close()
+    """
+    return(dict(iter_google_sheets(
+        sheets,
+        max_workers=max_workers,
+        retries=retries,
+        backoff=backoff,
+        fallback=fallback,
+        urls=urls,
+        mirror=mirror,
+        offline=offline
+    )))
+
+
+def iter_google_sheets(
+    sheets,
+    max_workers=4,
+    retries=3,
+    backoff=0.5,
+    fallback=False,
+    urls=None,
+    mirror=None,
+    offline=None
+):
+    """
+    Download several Google Sheets concurrently, yielding each one as soon
+    as it is on disk so that it can be parsed while the others download.
+
+    Parameters
+    ----------
+    see download_google_sheets
+
+    Yields
+    ------
+    docid_filepath : 2-tuple
+        (docid, filepath), in order of completion
+    """
+    urls = urls if urls else {}
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(sheets)))
+    ) as executor:
+        futures = {
+            executor.submit(
+                _download_with_retries,
+                sheets[docid],
+                docid,
+                urls.get(docid),
+                mirror,
+                offline,
+                retries,
+                backoff
+            ): docid for docid in sheets
+        }
+        for future in as_completed(futures):
+            docid = futures[future]
+            try:
+                filepath = future.result()
+            except Exception as e:
+                if not (fallback and os.path.exists(sheets[docid])):
+                    raise
+                print('Using local copy of "{0}": {1}'.format(docid, e))
+                filepath = sheets[docid]
+            yield((docid, filepath))
+
+
+def _download_with_retries(
+    filepath,
+    docid,
+    url,
+    mirror,
+    offline,
+    retries,
+    backoff
+):
+    """
+    Function to call download_google_sheet, retrying transient failures
+    with exponential backoff.
+
+    Parameters
+    ----------
+    see download_google_sheet and download_google_sheets
+
+    Returns
+    -------
+    filepath : string
+    """
+    for attempt in range(retries + 1):
+        try:
+            return(download_google_sheet(
+                filepath,
+                docid,
+                url,
+                mirror,
+                offline
+            ))
+        except (OSError, http.client.HTTPException) as e:
+            if attempt == retries or (
+                isinstance(e, urllib.error.HTTPError) and
+                e.code != 429 and
+                e.code < 500
+            ):
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+
+def _get(url, headers, redirects=5):
+    """
+    Function to send a GET request over this thread's keep-alive
+    connection for the URL's host, following redirects.
+
+    The caller must read the response to the end before the connection
+    can be reused.
+
+    Parameters
+    ----------
+    url : string
+
+    headers : dictionary
+
+    redirects : int, optional
+        maximum number of redirects to follow
+
+    Returns
+    -------
+    response : http.client.HTTPResponse
+
+    url : string
+        URL of the final response
+    """
+    if not hasattr(_connections, "pool"):
+        _connections.pool = {}
+    pool = _connections.pool
+    for redirect in range(redirects + 1):
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ["http", "https"]:
+            raise Exception('Cannot download "{0}"'.format(url))
+        key = (parts.scheme, parts.netloc)
+        path = urllib.parse.urlunsplit(
+            ("", "", parts.path if parts.path else "/", parts.query, "")
+        )
+        for fresh in ([False, True] if key in pool else [True]):
+            if fresh:
+                pool[key] = (
+                    http.client.HTTPSConnection if parts.scheme == "https"
+                    else http.client.HTTPConnection
+                )(parts.netloc, timeout=60)
+            try:
+                pool[key].request("GET", path, headers=headers)
+                response = pool[key].getresponse()
+                break
+            except (OSError, http.client.HTTPException):
+                pool.pop(key).close()
+                if fresh:
+                    raise
+        location = response.getheader("Location")
+        if response.status not in [301, 302, 303, 307, 308] or not location:
+            return(response, url)
+        response.read()
+        url = urllib.parse.urljoin(url, location)
+    raise Exception('Too many redirects from "{0}"'.format(url))
+
+
+def _mirror_copy(filepath, mirror_path):
+    """
+    Function to copy a downloaded file into the mirror directory if the
+    mirror copy is missing or differs.
+
+    Parameters
+    ----------
+    filepath: string
+
+    mirror_path: string or None
+
+    Returns
+    -------
+    None
+    """
+    if not mirror_path:
+        return(None)
+    if os.path.exists(mirror_path) and file_hash(
+        mirror_path
+    ) == file_hash(filepath):
+        return(None)
+    if not os.path.exists(os.path.dirname(os.path.abspath(mirror_path))):
+        os.makedirs(os.path.dirname(os.path.abspath(mirror_path)))
+    temporary_path = "{0}.{1}.tmp".format(mirror_path, os.getpid())
+    shutil.copyfile(filepath, temporary_path)
+    os.replace(temporary_path, mirror_path)
+    return(None)
+
+
 def return_none_for_nan(input_value):
     """
     Return None if input is a NaN value; otherwise, return the input.
@@ -138,24 +708,19 @@ def return_none_for_nan(input_value):
     -------
     value_not_nan : string or number
 
+    Example
+    -------
+    >>> import numpy as np
+    >>> import pandas as pd
+    >>> print([return_none_for_nan(x) for x in ["goose", np.nan, pd.NA, "nan"]])
+    ['goose', None, None, None]
     """
-    import numpy as np
-
-    def is_not_nan(s):
-        if s:
-            if isinstance(s, float) and np.isnan(s):
-                return False
-            elif str(s) in ['NaN', 'nan']:
-                return False
-            else:
-                return True
-        else:
-            return False
-
-    if is_not_nan(input_value):
-        return input_value
-    else:
+    if is_missing(input_value) or not input_value or str(input_value) in [
+        'NaN',
+        'nan'
+    ]:
         return None
+    return input_value
 
 
 def return_float(input_number):
@@ -172,27 +737,33 @@ def return_float(input_number):
         raise exception if not a number or string of a number
 
     """
-    import numpy as np
-
-    def is_number(s):
-        if s:
-            if isinstance(s, float) and np.isnan(s):
-                return False
-            else:
-                try:
-                    float(s)
-                    return True
-                except ValueError:
-                    return False
-        else:
-            return False
-
-    if is_number(input_number):
+    if is_missing(input_number) or not input_number:
+        return None
+    try:
         return float(input_number)
-    else:
+    except ValueError:
         return None
 
 
+def is_missing(input_value):
+    """
+    Return True if input is None, NaN or pandas.NA.
+
+    Parameters
+    ----------
+    input_value : anything
+
+    Returns
+    -------
+    missing : Boolean
+    """
+    return(
+        input_value is None or input_value is pd.NA or (
+            isinstance(input_value, float) and input_value != input_value
+        )
+    )
+
+
 def return_string(input_string, replace=[], replace_with=[]):
     """
     Return a stripped string.
@@ -259,9 +830,6 @@ def create_label(input_string):
         alphanumeric characters of input_string
 
     """
-    from mhdb.spreadsheet_io import return_string
-    from mhdb.spreadsheet_io import convert_string_to_label
-
     if input_string:
         if isinstance(input_string, str):
             output_string = return_string(input_string,
@@ -301,7 +869,6 @@ def get_cell(worksheet, column_label, index, exclude=[], no_nan=True):
         worksheet cell
 
     """
-    from mhdb.spreadsheet_io import return_none_for_nan
 
     if column_label in worksheet.columns:
         column = worksheet[column_label]
@@ -321,7 +888,7 @@ def get_cell(worksheet, column_label, index, exclude=[], no_nan=True):
         #raise Exception("column {0} not in worksheet.".format(column_label))
 
 
-def get_index2(worksheet1, column1_label, index1, worksheet2):
+def get_index2(worksheet1, column1_label, index1, worksheet2, positions=None):
     """
     Find the location of an 'index' value in a worksheet.
 
@@ -339,6 +906,9 @@ def get_index2(worksheet1, column1_label, index1, worksheet2):
         worksheet1 row index
     worksheet2 : pandas dataframe
         second worksheet with 'index' column header
+    positions : dictionary, optional
+        index_map(worksheet2), built once to reuse across lookups in an
+        unchanged worksheet2; without it, the "index" column is searched
 
     Returns
     -------
@@ -349,20 +919,18 @@ def get_index2(worksheet1, column1_label, index1, worksheet2):
     #import pandas as pd
 
     from mhdb.spreadsheet_io import get_cell
-    from mhdb.spreadsheet_io import return_float
 
     cell = get_cell(worksheet1, column1_label, index1, exclude=[], no_nan=True)
     if cell:
         index1to2 = return_float(cell)
         if index1to2:
             try:
+                if positions is not None:
+                    return positions.get(index1to2)
                 index_column = worksheet2['index']
-                if any(index_column.isin([index1to2])):
-                    index2 = index_column[index_column == index1to2].index[0]
-                    return index2
-                else:
-                    return None
-            except ValueError:
+                rows = index_column.index[(index_column == index1to2).values]
+                return rows[0] if len(rows) else None
+            except KeyError:
                 raise Exception("Either the worksheet2 doesn't exist or "
                                 "it doesn't have an 'index' column.")
         else:
@@ -371,7 +939,45 @@ def get_index2(worksheet1, column1_label, index1, worksheet2):
         return None
 
 
-def get_cells(worksheet, index, worksheet2=None, exclude=[], no_nan=True):
+def index_map(worksheet):
+    """
+    Map each value of a worksheet's "index" column to its (first) row index.
+
+    The map is built from the column as it is now; build it once and pass
+    it to get_index2 or get_cells to look up many rows of an unchanged
+    worksheet.
+
+    Parameters
+    ----------
+    worksheet : pandas dataframe
+        worksheet with 'index' column header
+
+    Returns
+    -------
+    positions : dictionary
+        {"index" value : worksheet row index}
+
+    Examples
+    --------
+    >>> import pandas as pd
+    >>> worksheet = pd.DataFrame({"index": [8, 84, 8, None]})
+    >>> print(index_map(worksheet))
+    {8.0: 0, 84.0: 1}
+    >>> worksheet.loc[0, "index"] = 9.0
+    >>> print(index_map(worksheet))
+    {9.0: 0, 84.0: 1, 8.0: 2}
+
+    """
+    index_column = worksheet['index']
+    present = index_column.notna()
+    positions = {}
+    for value, row in zip(index_column[present], index_column.index[present]):
+        positions.setdefault(value, row)
+    return positions
+
+
+def get_cells(worksheet, index, worksheet2=None, exclude=[], no_nan=True,
+              positions=None):
     """
     Get cells from a worksheet with the following column headers:
     "equivalentClass"
@@ -397,6 +1003,8 @@ def get_cells(worksheet, index, worksheet2=None, exclude=[], no_nan=True):
         exclusion list
     no_nan : Boolean
         return None for NaN values?
+    positions : dictionary, optional
+        index_map(worksheet2), to reuse across rows
 
     Returns
     -------
@@ -433,7 +1041,7 @@ def get_cells(worksheet, index, worksheet2=None, exclude=[], no_nan=True):
     definition_ref_uri = None
     if worksheet2 is not None:
         index2 = get_index2(worksheet, 'DefinitionReference_index', index,
-                            worksheet2)
+                            worksheet2, positions)
         if index2:
             definition_ref = get_cell(worksheet2, 'ReferenceName', index2, exclude, True)
             definition_ref_uri = get_cell(worksheet2, 'ReferenceLink', index2, exclude, True)
@@ -443,40 +1051,169 @@ def get_cells(worksheet, index, worksheet2=None, exclude=[], no_nan=True):
            definition, definition_ref, definition_ref_uri
 
 
-def split_on_slash(df, column, delimiter=" / "):
+def get_cells_frame(worksheet, worksheet2=None, exclude=[], no_nan=True):
+    """
+    Get the `get_cells` fields for every row of a worksheet at once.
+
+    Parameters
+    ----------
+    worksheet : pandas dataframe
+        worksheet with column headers (see `get_cells`)
+    worksheet2 : pandas dataframe
+        second worksheet with definition reference information
+    exclude : list
+        exclusion list
+    no_nan : Boolean
+        return None for NaN values?
+
+    Returns
+    -------
+    cells : pandas dataframe
+        one row per worksheet row (same index), with columns
+        "equivalent_class_uri", "subclassof_uri", "property_domain",
+        "property_range", "definition", "definition_ref" and
+        "definition_ref_uri"; missing cells are None
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> import pandas as pd
+    >>> worksheet = pd.DataFrame({
+    ...     "subClassOf": [":Bird", np.nan],
+    ...     "Definition": ["a goose", "a duck"],
+    ...     "DefinitionReference_index": [84, 8]
+    ... })
+    >>> references = pd.DataFrame({
+    ...     "index": [8, 84],
+    ...     "ReferenceName": ["DSM", "Audubon"],
+    ...     "ReferenceLink": [np.nan, "http://www.audubon.org"]
+    ... })
+    >>> cells = get_cells_frame(worksheet, references)
+    >>> print(cells.loc[0].tolist())
+    [None, ':Bird', None, None, 'a goose', 'Audubon', 'http://www.audubon.org']
+    >>> get_cells_frame(worksheet, references).loc[1].tolist() == list(
+    ...     get_cells(worksheet, 1, references))
+    True
+
+    """
+    def cells(sheet, column_label):
+        if column_label not in sheet.columns:
+            return pd.Series([None] * len(sheet), index=sheet.index,
+                             dtype=object)
+        column = sheet[column_label].astype(object)
+        keep = pd.Series(True, index=sheet.index)
+        if no_nan:
+            keep = column.notna() & column.astype(bool) & \
+                   ~column.isin(['NaN', 'nan'])
+        if exclude:
+            keep &= ~column.isin(exclude)
+        return column.where(keep, None)
+
+    frame = pd.DataFrame({
+        'equivalent_class_uri': cells(worksheet, 'equivalentClass'),
+        'subclassof_uri': cells(worksheet, 'subClassOf'),
+        'property_domain': cells(worksheet, 'propertyDomain'),
+        'property_range': cells(worksheet, 'propertyRange'),
+        'definition': cells(worksheet, 'Definition'),
+        'definition_ref': [None] * len(worksheet),
+        'definition_ref_uri': [None] * len(worksheet)
+    }, index=worksheet.index)
+
+    if worksheet2 is not None and \
+            'DefinitionReference_index' in worksheet.columns:
+        positions = pd.to_numeric(
+            worksheet['DefinitionReference_index'].astype(object).where(
+                worksheet['DefinitionReference_index'].astype(bool)),
+            errors='coerce'
+        )
+        positions = positions.where(positions != 0).map(index_map(worksheet2))
+        # get_cells treats a reference in row 0 as missing
+        found = positions.notna() & (positions != 0)
+        for field, column_label in [('definition_ref', 'ReferenceName'),
+                                    ('definition_ref_uri', 'ReferenceLink')]:
+            values = cells(worksheet2, column_label).reindex(
+                positions[found]).values
+            frame.loc[found, field] = pd.Series(
+                values, index=positions[found].index, dtype=object)
+    return frame
+
+
+def split_on_slash(df, column, delimiter=" / ", strip=False):
     """
     Function to build appropriate rows when
     splitting cells in a named column by
     " / " or named delimiter
 
+    Each split cell becomes one row per piece, with the original row's
+    index label and other values; split columns are moved to the end.
+    Splitting several columns gives every combination of their pieces,
+    as splitting them one after another would. Values that are not
+    strings are kept as they are.
+
     Parameters
     ----------
     df: DataFrame
 
-    column: string
+    column: string or list of strings
 
     delimiter: string, optional
 
+    strip: Boolean, optional
+        strip whitespace from each piece?
+
     Returns
     -------
     df: DataFrame
+
+    Example
+    -------
+    >>> import numpy as np
+    >>> import pandas as pd
+    >>> df = pd.DataFrame(
+    ...     {"bird": ["goose / duck", "swan", np.nan], "n": [1, 2, 3]},
+    ...     index=[10, 11, 12]
+    ... )
+    >>> print(split_on_slash(df, "bird").to_dict("split")["data"])
+    [[1, 'goose'], [1, 'duck'], [2, 'swan'], [3, nan]]
+    >>> print(list(split_on_slash(df, "bird").index))
+    [10, 10, 11, 12]
+    >>> print(list(split_on_slash(df, ["bird"], "/", strip=True)["bird"][:2]))
+    ['goose', 'duck']
     """
-    df[column] = pd.Series(df[column].apply(lambda x: trysplit(
-        x,
-        delimiter
-    )))
-    s = df.apply(
-        lambda x:
-            pd.Series(
-                x[column]
-            ),
-            axis=1
-    ).stack().reset_index(
-        level=1,
-        drop=True
-    )
-    s.name = column
-    return(df.drop(column, axis=1).join(s))
+    columns = [column] if isinstance(column, str) else list(column)
+    df = df[[c for c in df.columns if c not in columns] + columns].copy()
+    for c in columns:
+        df[c] = _apply_to_strings(df[c], "split", delimiter)
+        df = df.explode(c)
+        if strip:
+            df[c] = _apply_to_strings(df[c], "strip")
+    return(df)
+
+
+def _apply_to_strings(series, method, *args):
+    """
+    Function to apply a vectorized `Series.str` method to the strings in a
+    Series, keeping every other value as it is.
+
+    Parameters
+    ----------
+    series: Series
+
+    method: string
+        name of a `Series.str` method, eg, "split"
+
+    args: positional arguments for the method
+
+    Returns
+    -------
+    series: Series
+    """
+    try:
+        result = getattr(series.str, method)(*args)
+    except AttributeError:
+        # no strings to apply the method to
+        return(series)
+    return(result.where(result.notna(), series))
 
 
 def trysplit(x, delimiter):
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+This program contains a compact, dictionary-encoded store for RDF
+statements that can stand in for the {subject: {predicate: {object}}}
+dictionaries built by mhdb.ingest.
+
+Copyright 2018, Child Mind Institute (http://childmind.org), Apache v2.0 License
+
+"""
+import os
+import sys
+top_dir = os.path.abspath(os.path.join(
+    (__file__),
+    os.pardir,
+    os.pardir
+))
+if top_dir not in sys.path:
+    sys.path.append(top_dir)
+try:
+    from mhdb.write_ttl import turtle_from_dict
+except:
+    from mhdb.mhdb.write_ttl import turtle_from_dict
+from array import array
+from collections.abc import Mapping, MutableMapping
+from types import MappingProxyType
+
+
+class FrozenStatements(Mapping):
+    """
+    Immutable statements graph built once from (subject, predicate, object)
+    triples, eg, vocabulary that does not depend on any workbook.
+
+    Viewed as a mapping, a FrozenStatements looks like a statements
+    dictionary whose predicate mappings are read-only and whose object
+    sets are frozensets, so it can be passed to `mhdb.ingest.merge_statements`
+    (or `StatementStore.update_statements`) any number of times without
+    being changed. Its Turtle is rendered once, at construction, in triple
+    order.
+
+    Example
+    -------
+    >>> frozen = FrozenStatements([
+    ...     (":goose", ":chases", ":it"),
+    ...     (":goose", ":chases", ":duck"),
+    ...     (":goose", ":chases", ":it"),
+    ...     (":duck", ":sits", ":still")
+    ... ])
+    >>> print(len(frozen), frozen.triple_count)
+    2 3
+    >>> print(sorted(frozen[":goose"][":chases"]))
+    [':duck', ':it']
+    >>> frozen.turtle
+    ':goose :chases :it ;\\n\\t:chases :duck .\\n\\n:duck :sits :still .'
+    >>> frozen[":goose"][":honks"] = {":loudly"}
+    Traceback (most recent call last):
+    ...
+    TypeError: 'mappingproxy' object does not support item assignment
+    """
+    def __init__(self, triples):
+        ordered = {}
+        for subject, predicate, object in triples:
+            ordered.setdefault(subject, {}).setdefault(
+                predicate,
+                {}
+            )[object] = None
+        self._statements = {
+            subject: MappingProxyType({
+                predicate: frozenset(objects) for predicate, objects in
+                predicates.items()
+            }) for subject, predicates in ordered.items()
+        }
+        self._triples = tuple(
+            (subject, predicate, object) for subject, predicates in
+            ordered.items() for predicate, objects in predicates.items() for
+            object in objects
+        )
+        self.turtle = turtle_from_dict(ordered)
+
+    def __getitem__(self, subject):
+        return(self._statements[subject])
+
+    def __iter__(self):
+        return(iter(self._statements))
+
+    def __len__(self):
+        return(len(self._statements))
+
+    def __repr__(self):
+        return("FrozenStatements({0})".format(repr(self._triples)))
+
+    @property
+    def triple_count(self):
+        """
+        Number of statements in the graph.
+        """
+        return(len(self._triples))
+
+    def triples(self):
+        """
+        Generator of (subject, predicate, object) string 3-tuples in the
+        order they were given, grouped by subject.
+        """
+        return(iter(self._triples))
+
+
+class StatementStore(MutableMapping):
+    """
+    Triple store that encodes each distinct term as an integer and keeps,
+    for each subject, an array of object ids per predicate id.
+
+    Viewed as a mapping, a StatementStore looks like the statements
+    dictionaries used throughout mhdb:
+
+        key: string
+            RDF subject
+        value: mapping
+            key: string
+                RDF predicate
+            value: {string}
+                set of RDF objects
+
+    Objects are returned as frozensets, so `store[subject][predicate]`
+    cannot be changed in place; use `add` (or `mhdb.ingest.add_if`) to add
+    statements. Duplicates are found by scanning the predicate's object
+    array, or, once it is longer than LARGE, a set of its object ids.
+
+    Example
+    -------
+    >>> store = StatementStore()
+    >>> store.add(":goose", ":chases", ":it")
+    True
+    >>> store.add(":goose", ":chases", ":it")
+    False
+    >>> store.add(":goose", ":chases", ":duck")
+    True
+    >>> print(sorted(store[":goose"][":chases"]))
+    [':duck', ':it']
+    >>> store[":goose"][":chases"].add(":swan")
+    Traceback (most recent call last):
+    ...
+    AttributeError: 'frozenset' object has no attribute 'add'
+    >>> store[":duck"] = {":sits": {":still"}}
+    >>> print(len(store), len(store.terms), store.triple_count)
+    2 6 3
+    >>> print(store.to_dict()[":duck"])
+    {':sits': {':still'}}
+    >>> import pickle
+    >>> print(list(pickle.loads(pickle.dumps(store)).triples())[-1])
+    (':duck', ':sits', ':still')
+    """
+    # number of objects of one subject and predicate above which their
+    # ids are also kept in a set, so adding stays O(1)
+    LARGE = 16
+
+    def __init__(self, statements=None):
+        self.terms = []
+        self._ids = {}
+        self._statements = {}
+        self._object_sets = {}
+        self._triple_count = 0
+        if statements:
+            self.update_statements(statements)
+
+    def __contains__(self, subject):
+        return(self._ids.get(subject) in self._statements)
+
+    def __delitem__(self, subject):
+        subject_id = self._ids.get(subject)
+        if subject_id not in self._statements:
+            raise KeyError(subject)
+        for predicate_id, object_ids in self._statements.pop(
+            subject_id
+        ).items():
+            self._triple_count -= len(object_ids)
+            self._object_sets.pop((subject_id, predicate_id), None)
+
+    def __getitem__(self, subject):
+        subject_id = self._ids.get(subject)
+        if subject_id not in self._statements:
+            raise KeyError(subject)
+        return(_PredicateView(self, subject_id))
+
+    def __getstate__(self):
+        # pickle the terms and flat subject, predicate and object id
+        # columns; the index is rebuilt on unpickling
+        subjects = array("q")
+        predicates = array("q")
+        objects = array("q")
+        for subject_id, predicate_objects in self._statements.items():
+            for predicate_id, object_ids in predicate_objects.items():
+                subjects.extend([subject_id] * len(object_ids))
+                predicates.extend([predicate_id] * len(object_ids))
+                objects.extend(object_ids)
+        return((self.terms, subjects, predicates, objects))
+
+    def __iter__(self):
+        for subject_id in list(self._statements):
+            yield(self.terms[subject_id])
+
+    def __len__(self):
+        return(len(self._statements))
+
+    def __repr__(self):
+        return("StatementStore({0})".format(repr(self.to_dict())))
+
+    def __setstate__(self, state):
+        self.__init__()
+        self.terms, subjects, predicates, objects = state
+        self._ids = {term: term_id for term_id, term in enumerate(self.terms)}
+        for ids in zip(subjects, predicates, objects):
+            self._add_ids(*ids)
+
+    def __setitem__(self, subject, predicates):
+        if subject in self:
+            del self[subject]
+        for predicate in predicates:
+            for object in predicates[predicate]:
+                self.add(subject, predicate, object)
+
+    def add(self, subject, predicate, object):
+        """
+        Add one statement.
+
+        Parameters
+        ----------
+        subject: string
+            Turtle-formatted IRI
+
+        predicate: string
+            Turtle-formatted IRI
+
+        object: string
+            Turtle-formatted IRI or literal
+
+        Returns
+        -------
+        added: Boolean
+            False if the statement was already in the store
+        """
+        return(self._add_ids(
+            self._intern(subject),
+            self._intern(predicate),
+            self._intern(object)
+        ))
+
+    def compact(self):
+        """
+        Release the spare capacity of the object arrays, eg, once a graph
+        is built.
+
+        Returns
+        -------
+        store: StatementStore
+            self
+        """
+        for predicate_objects in self._statements.values():
+            for predicate_id in predicate_objects:
+                predicate_objects[predicate_id] = array(
+                    "q",
+                    predicate_objects[predicate_id]
+                )
+        return(self)
+
+    def to_dict(self):
+        """
+        Decode the store into a statements dictionary.
+
+        Returns
+        -------
+        statements: dictionary
+            key: string
+                RDF subject
+            value: dictionary
+                key: string
+                    RDF predicate
+                value: {string}
+                    set of RDF objects
+        """
+        return({
+            subject: {
+                predicate: set(objects) for predicate, objects in self[
+                    subject
+                ].items()
+            } for subject in self
+        })
+
+    @property
+    def triple_count(self):
+        """
+        Number of statements in the store.
+        """
+        return(self._triple_count)
+
+    def triples(self):
+        """
+        Generator of (subject, predicate, object) string 3-tuples grouped
+        by subject and then by predicate, each in insertion order.
+        """
+        terms = self.terms
+        for subject_id in list(self._statements):
+            for predicate_id, object_ids in list(
+                self._statements[subject_id].items()
+            ):
+                for object_id in object_ids:
+                    yield((
+                        terms[subject_id],
+                        terms[predicate_id],
+                        terms[object_id]
+                    ))
+
+    def update_statements(self, statements):
+        """
+        Add every statement in a statements mapping (or another
+        StatementStore), keeping statements already in the store.
+
+        Parameters
+        ----------
+        statements: dictionary, FrozenStatements or StatementStore
+
+        Returns
+        -------
+        store: StatementStore
+            self
+        """
+        if isinstance(statements, (FrozenStatements, StatementStore)):
+            for triple in statements.triples():
+                self.add(*triple)
+        else:
+            for subject in statements:
+                for predicate in statements[subject]:
+                    for object in statements[subject][predicate]:
+                        self.add(subject, predicate, object)
+        return(self)
+
+    def _add_ids(self, subject_id, predicate_id, object_id):
+        predicate_objects = self._statements.get(subject_id)
+        if predicate_objects is None:
+            predicate_objects = self._statements[subject_id] = {}
+        object_ids = predicate_objects.get(predicate_id)
+        if object_ids is None:
+            predicate_objects[predicate_id] = array("q", [object_id])
+        elif len(object_ids) < self.LARGE:
+            if object_id in object_ids:
+                return(False)
+            object_ids.append(object_id)
+        else:
+            object_set = self._object_sets.get((subject_id, predicate_id))
+            if object_set is None:
+                object_set = self._object_sets[
+                    (subject_id, predicate_id)
+                ] = set(object_ids)
+            if object_id in object_set:
+                return(False)
+            object_set.add(object_id)
+            object_ids.append(object_id)
+        self._triple_count += 1
+        return(True)
+
+    def _intern(self, term):
+        term_id = self._ids.get(term)
+        if term_id is None:
+            term_id = len(self.terms)
+            self._ids[term] = term_id
+            self.terms.append(term)
+        return(term_id)
+
+
+class _PredicateView(Mapping):
+    """
+    Read-only {predicate: {object}} view of one subject in a
+    StatementStore.
+    """
+    def __init__(self, store, subject_id):
+        self._store = store
+        self._subject_id = subject_id
+
+    def __contains__(self, predicate):
+        return(self._store._ids.get(predicate) in self._predicate_objects())
+
+    def __getitem__(self, predicate):
+        store = self._store
+        object_ids = self._predicate_objects().get(store._ids.get(predicate))
+        if object_ids is None:
+            raise KeyError(predicate)
+        terms = store.terms
+        return(frozenset([terms[object_id] for object_id in object_ids]))
+
+    def __iter__(self):
+        terms = self._store.terms
+        for predicate_id in list(self._predicate_objects()):
+            yield(terms[predicate_id])
+
+    def __len__(self):
+        return(len(self._predicate_objects()))
+
+    def __repr__(self):
+        return(repr(dict(self.items())))
+
+    def _predicate_objects(self):
+        return(self._store._statements.get(self._subject_id, {}))
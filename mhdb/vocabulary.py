@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+This program contains the fixed vocabulary that mhdb.ingest adds to every
+build, defined once as data and frozen into graph fragments (with their
+Turtle) at import time.
+
+Copyright 2018, Child Mind Institute (http://childmind.org), Apache v2.0 License
+
+"""
+import os
+import sys
+top_dir = os.path.abspath(os.path.join(
+    (__file__),
+    os.pardir,
+    os.pardir
+))
+if top_dir not in sys.path:
+    sys.path.append(top_dir)
+try:
+    from mhdb.statement_store import FrozenStatements
+    from mhdb.write_ttl import check_iri, language_string
+except:
+    from mhdb.mhdb.statement_store import FrozenStatements
+    from mhdb.mhdb.write_ttl import check_iri, language_string
+
+_AFIRM_SOCIAL_NARRATIVES = check_iri(
+    "http://afirm.fpg.unc.edu/social-narratives"
+)
+_ANN_M_SAM = check_iri("http://fpg.unc.edu/profiles/ann-m-sam")
+_IEEE_ROBOTICS = check_iri(
+    "https://dx.doi.org/10.1109/IEEESTD.2015.7084073"
+)
+
+# (subject, [(predicate, object), ...]) with Turtle-formatted terms, in the
+# order they are written
+_PROJECT_VOCABULARY = [
+    ("schema:Book", [("rdfs:subClassOf", "mhdb:BookOrArticle")]),
+    ("schema:Article", [("rdfs:subClassOf", "mhdb:BookOrArticle")]),
+    ("mhdb:BookOrArticle", [
+        ("rdfs:subClassOf", "schema:CreativeWork"),
+        ("rdfs:subClassOf", "dcterms:BibliographicResource"),
+        ("rdfs:label", language_string("Book / Article"))
+    ]),
+    ("mhdb:Assessment", [
+        ("rdfs:subClassOf", "schema:CreativeWork"),
+        ("rdfs:subClassOf", "schema:MedicalTest"),
+        ("rdfs:label", language_string("Assessment"))
+    ]),
+    ("mhdb:VirtualReality", [
+        ("rdfs:subClassOf", "schema:CreativeWork"),
+        ("rdfs:subClassOf", "dcterms:InteractiveResource"),
+        ("rdfs:label", language_string("Virtual Reality"))
+    ]),
+    ("mhdb:AugmentedReality", [
+        ("rdfs:subClassOf", "schema:CreativeWork"),
+        ("rdfs:subClassOf", "dcterms:InteractiveResource"),
+        ("rdfs:label", language_string("Augmented Reality"))
+    ]),
+    ("mhdb:ResourceGuide", [
+        ("rdfs:subClassOf", "schema:Book"),
+        ("rdfs:label", language_string("Resource Guide"))
+    ]),
+    ("mhdb:CommunityInitiative", [
+        ("rdfs:subClassOf", "schema:Service"),
+        ("rdfs:subClassOf", "schema:OrganizeAction"),
+        ("rdfs:label", language_string("Community Initiative"))
+    ]),
+    ("mhdb:Wearable", [
+        ("rdfs:subClassOf", "ssn:Device"),
+        ("rdfs:comment", language_string(
+            "A smart electronic device (electronic device with "
+            "micro-controller(s)) that can be worn on the body as implants or "
+            "accessories."
+        )),
+        ("rdfs:isDefinedBy", check_iri(
+            "https://en.wikipedia.org/wiki/Wearable_technology"
+        )),
+        ("rdfs:label", language_string("Wearable"))
+    ]),
+    ("mhdb:Tablet", [
+        ("rdfs:subClassOf", "ssn:Device"),
+        ("rdfs:label", language_string("Tablet"))
+    ]),
+    ("mhdb:NonDigitalGame", [
+        ("rdfs:subClassOf", "schema:Game"),
+        ("owl:disjointWith", "schema:VideoGame"),
+        ("rdfs:label", language_string("Non-Digital Game"))
+    ]),
+    (_IEEE_ROBOTICS, [
+        ("datacite:usesIdentifierScheme", "datacite:doi"),
+        (
+            "datacite:hasIdentifier",
+            '"""10.1109/IEEESTD.2015.7084073"""^^rdfs:Literal'
+        ),
+        ("rdfs:label", language_string(
+            "1872-2015 - IEEE Standard Ontologies for Robotics and Automation"
+        ))
+    ]),
+    ("mhdb:Robot", [
+        ("rdfs:subClassOf", "dcterms:Agent"),
+        ("rdfs:subClassOf", "ssn:Device"),
+        ("dcterms:source", _IEEE_ROBOTICS),
+        ("rdfs:label", language_string("Robot")),
+        ("rdfs:comment", language_string(
+            "An agentive device (Agent and Device in SUMO) in a broad "
+            "sense, purposed to act in the physical world in order to "
+            "accomplish one or more tasks. In some cases, the actions of a "
+            "robot might be subordinated to actions of other agents (Agent "
+            "in SUMO), such as software agents (bots) or humans. A robot "
+            "is composed of suitable mechanical and electronic parts. "
+            "Robots might form social groups, where they interact to "
+            "achieve a common goal. A robot (or a group of robots) can "
+            "form robotic systems together with special environments "
+            "geared to facilitate their work."
+        ))
+    ]),
+    ("mhdb:SocialNarrative", [
+        ("rdfs:subClassOf", "schema:CreativeWork"),
+        ("dcterms:source", _AFIRM_SOCIAL_NARRATIVES),
+        ("rdfs:isDefinedBy", _AFIRM_SOCIAL_NARRATIVES),
+        ("rdfs:comment", language_string(
+            "Social narratives (SN) describe social situations for "
+            "learners by providing relevant cues, explanation of the "
+            "feelings and thoughts of others, and descriptions of "
+            "appropriate behavior expectations."
+        )),
+        ("rdfs:label", language_string("Social Narrative"))
+    ]),
+    (_ANN_M_SAM, [
+        ("rdfs:label", language_string("Ann M. Sam")),
+        ("foaf:name", language_string("Ann M. Sam")),
+        ("foaf:familyName", language_string("Sam")),
+        ("foaf:givenName", language_string("Ann")),
+        ("rdfs:type", "foaf:Person"),
+        ("rdfs:site", "mhdb:University_of_North_Carolina_at_Chapel_Hill")
+    ]),
+    (check_iri("AFIRM Team"), [
+        ("rdfs:label", language_string("AFIRM Team")),
+        ("foaf:name", language_string("AFIRM Team")),
+        ("rdfs:type", "foaf:Organization"),
+        ("rdfs:site", "mhdb:University_of_North_Carolina_at_Chapel_Hill")
+    ]),
+    (_AFIRM_SOCIAL_NARRATIVES, [
+        ("dcterms:contributor", _ANN_M_SAM),
+        ("dcterms:contributor", check_iri("AFIRM Team"))
+    ]),
+    ("mhdb:SocialNarrativeGamingSystem", [
+        ("rdfs:subClassOf", "mhdb:SocialNarrative"),
+        ("rdfs:subClassOf", "schema:Game"),
+        ("rdfs:label", language_string(
+            "Combination of a Social Narrative and Gaming System"
+        ))
+    ]),
+    ("mhdb:StudyWithParents", [
+        ("rdfs:subClassOf", "sio:SIO_001066"),
+        ("schema:participant", "schema:ParentAudience")
+    ]),
+    ("mhdb:Competition", [
+        ("rdfs:label", language_string("Competition")),
+        ("rdfs:subClassOf", "schema:Event")
+    ]),
+    ("mhdb:ScienceContest", [
+        ("rdfs:label", language_string("Science Contest")),
+        ("rdfs:subClassOf", "mhdb:Competition")
+    ]),
+    ("mhdb:MOOC", [
+        ("rdfs:label", language_string("Massive Open Online Course")),
+        ("rdfs:subClassOf", "schema:Course")
+    ])
+    # TODO: define Toy, StudentProject, Hackathon, OutreachProgram, SupportGroup
+]
+
+_SITE_VOCABULARY = [
+    ("mhdb:site", [
+        ("rdfs:label", language_string("site")),
+        ("rdfs:comment", language_string(
+            "Site, place or location of anything."
+        )),
+        ("rdfs:range", "schema:Place"),
+        ("rdfs:range", "dcterms:Location"),
+        ("rdf:type", "rdf:Property")
+    ])
+]
+
+
+def freeze_vocabulary(vocabulary):
+    """
+    Function to compile vocabulary data into an immutable graph fragment.
+
+    Parameters
+    ----------
+    vocabulary: list of 2-tuples
+        (subject, [(predicate, object), ...]) with Turtle-formatted terms
+
+    Returns
+    -------
+    statements: FrozenStatements
+        key: string
+            RDF subject
+        value: mapping
+            key: string
+                RDF predicate
+            value: frozenset
+                RDF objects
+
+    Example
+    -------
+    >>> statements = freeze_vocabulary(_SITE_VOCABULARY)
+    >>> print(sorted(statements["mhdb:site"]["rdfs:range"]))
+    ['dcterms:Location', 'schema:Place']
+    >>> print(statements.turtle.split(" ;")[0])
+    mhdb:site rdfs:label \"""site\"""@en
+    """
+    return(FrozenStatements([
+        (subject, predicate, object) for subject, predicates in
+        vocabulary for predicate, object in predicates
+    ]))
+
+
+PROJECT_VOCABULARY = freeze_vocabulary(_PROJECT_VOCABULARY)
+SITE_VOCABULARY = freeze_vocabulary(_SITE_VOCABULARY)
@@ -0,0 +1,561 @@
+#!/usr/bin/env python3
+"""
+This program contains functions and classes to load spreadsheet workbooks,
+caching parsed sheets on disk between runs.
+
+Copyright 2018, Child Mind Institute (http://childmind.org), Apache v2.0 License
+
+"""
+import hashlib
+import json
+import os
+import pandas as pd
+import time
+
+# Column types of known sheets, keyed by (workbook name, sheet name):
+#     "Int64": nullable integer, for `*_index` keys
+#     "int_list": list of integers, for comma-separated foreign keys
+#     "category": categorical, for repeated text
+_REFERENCE_INDEX = (
+    "reference_index (refer to reference in our master spreadsheet. 8=dsm, "
+    "84=us)"
+)
+
+SHEET_SCHEMAS = {
+    ("behavior", "Sheet1"): {
+        "sign_or_symptom_index": "Int64",
+        _REFERENCE_INDEX: "Int64",
+        "gender_index": "Int64"
+    },
+    ("behavior", "gender"): {
+        "index": "Int64"
+    },
+    ("mentalhealth", "DiagnosticCriterion"): {
+        "index": "Int64"
+    },
+    ("mentalhealth", "DiagnosticSpecifier"): {
+        "index": "Int64"
+    },
+    ("mentalhealth", "Disorder"): {
+        "index": "Int64",
+        "DisorderSeverity_index": "Int64",
+        "DiagnosticSpecifier_index": "Int64",
+        "DiagnosticInclusionCriterion_index": "Int64",
+        "DiagnosticInclusionCriterion2_index": "Int64",
+        "DiagnosticExclusionCriterion_index": "Int64",
+        "DiagnosticExclusionCriterion2_index": "Int64"
+    },
+    ("mentalhealth", "DisorderSeverity"): {
+        "index": "Int64"
+    },
+    ("mentalhealth", "Reference"): {
+        "index": "Int64"
+    },
+    ("technology", "HomePageLink"): {
+        "index": "Int64"
+    },
+    ("technology", "MHealthPeople"): {
+        "index": "Int64",
+        "Site": "category"
+    },
+    ("technology", "Project"): {
+        "disorder_index": "int_list",
+        "HomePageLink_index": "int_list",
+        "TypeOfProject_index": "int_list",
+        "MHealthPeople_index": "int_list",
+        "ResearchStudyOnProjectLink_index": "int_list"
+    },
+    ("technology", "ResearchStudyOnProject"): {
+        "index": "Int64"
+    },
+    ("technology", "TypeOfProject"): {
+        "index": "Int64"
+    }
+}
+
+
+def apply_schema(sheet, schema):
+    """
+    Function to coerce a sheet's columns to the types in a schema. Columns
+    that are missing or already of the given type are left alone, so
+    applying a schema twice changes nothing.
+
+    Parameters
+    ----------
+    sheet: DataFrame
+
+    schema: dictionary
+        key: string
+            column header
+        value: string
+            "Int64", "int_list" or "category"; see SHEET_SCHEMAS
+
+    Returns
+    -------
+    sheet: DataFrame
+        a copy, if any column was coerced
+
+    Example
+    -------
+    >>> import numpy as np
+    >>> import pandas as pd
+    >>> schema = {"index": "Int64", "keys": "int_list", "bird": "category"}
+    >>> sheet = apply_schema(pd.DataFrame({
+    ...     "index": [1.0, np.nan, "3"],
+    ...     "keys": ["1, 2", 3.0, np.nan],
+    ...     "bird": ["goose", "goose", "duck"]
+    ... }), schema)
+    >>> print(sheet["index"].tolist(), sheet["keys"].tolist())
+    [1, <NA>, 3] [[1, 2], [3], []]
+    >>> print(sheet.dtypes.astype(str).tolist())
+    ['Int64', 'object', 'category']
+    >>> print(apply_schema(sheet, schema) is sheet)
+    True
+    """
+    coerced = {}
+    for column, column_type in schema.items():
+        if column not in sheet.columns:
+            continue
+        values = sheet[column]
+        if column_type == "Int64":
+            if str(values.dtype) != "Int64":
+                numbers = pd.to_numeric(values, errors="coerce")
+                coerced[column] = numbers.where(
+                    numbers == numbers.round()
+                ).astype("Int64")
+        elif column_type == "int_list":
+            if not all(isinstance(value, list) for value in values):
+                coerced[column] = values.map(int_list).astype(object)
+        elif column_type == "category":
+            if str(values.dtype) != "category":
+                coerced[column] = values.astype("category")
+        else:
+            raise Exception('Unknown column type "{0}"'.format(column_type))
+    if not coerced:
+        return(sheet)
+    sheet = sheet.copy()
+    for column in coerced:
+        sheet[column] = coerced[column]
+    return(sheet)
+
+
+def file_hash(filepath, block_size=1 << 20):
+    """
+    Function to compute the SHA-256 hex digest of a file's contents.
+
+    Parameters
+    ----------
+    filepath: string
+
+    block_size: int, optional
+        number of bytes to read at a time
+
+    Returns
+    -------
+    digest: string
+        hexadecimal SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as fid:
+        for block in iter(lambda: fid.read(block_size), b""):
+            digest.update(block)
+    return(digest.hexdigest())
+
+
+def int_list(value, separator=","):
+    """
+    Function to parse a maybe-separated cell of foreign keys into a list.
+
+    Parameters
+    ----------
+    value: string, number, list or missing
+        eg, "1, 2", 3.0 or NaN; lists are returned as they are
+
+    separator: string, optional
+
+    Returns
+    -------
+    keys: list
+        integer keys; tokens that are not integers are kept as stripped
+        strings so that callers can report them
+
+    Example
+    -------
+    >>> import numpy as np
+    >>> print(int_list("1, 2.0,,duck"), int_list(3.0), int_list(np.nan))
+    [1, 2, 'duck'] [3] []
+    """
+    if isinstance(value, list):
+        return(value)
+    if value is None or value is pd.NA or (
+        isinstance(value, float) and value != value
+    ):
+        return([])
+    keys = []
+    for token in str(value).split(separator):
+        token = token.strip()
+        if not token:
+            continue
+        try:
+            number = float(token)
+        except ValueError:
+            keys.append(token)
+            continue
+        keys.append(int(number) if number.is_integer() else token)
+    return(keys)
+
+
+class CachedWorkbook(object):
+    """
+    Spreadsheet workbook that keeps each parsed sheet in an on-disk cache
+    keyed by the workbook's content hash, the sheet name and the parse
+    options, so that unchanged workbooks are only parsed once.
+
+    Cached sheets are pandas pickles. A CachedWorkbook can be used wherever
+    a pandas.ExcelFile is expected for `parse` and `sheet_names`.
+
+    Parameters
+    ----------
+    filepath: string
+        path to the workbook
+
+    cache_dir: string, optional
+        directory for cached sheets, default ".mhdb_cache" beside the
+        workbook
+
+    reader: callable, optional
+        function that takes filepath and returns an object with a
+        `parse(sheet_name, **kwargs)` method and a `sheet_names` attribute,
+        default pandas.ExcelFile
+
+    Example
+    -------
+    >>> import os
+    >>> import tempfile
+    >>> import pandas as pd
+    >>> class Reader(object):
+    ...     parses = 0
+    ...     sheet_names = ["Sheet1"]
+    ...     def __init__(self, filepath):
+    ...         pass
+    ...     def parse(self, sheet_name, **kwargs):
+    ...         Reader.parses += 1
+    ...         return pd.DataFrame({"goose": ["honk"]})
+    >>> directory = tempfile.mkdtemp()
+    >>> filepath = os.path.join(directory, "birds.xlsx")
+    >>> with open(filepath, "w") as fid:
+    ...     _ = fid.write("birds")
+    >>> for run in range(2):
+    ...     sheet = CachedWorkbook(filepath, reader=Reader).parse("Sheet1")
+    >>> print(sheet["goose"][0], Reader.parses)
+    honk 1
+    >>> with open(filepath, "w") as fid:
+    ...     _ = fid.write("more birds")
+    >>> sheet = CachedWorkbook(filepath, reader=Reader).parse("Sheet1")
+    >>> print(Reader.parses)
+    2
+    >>> workbook = CachedWorkbook(filepath, reader=Reader)
+    >>> print(workbook.sheet_names, workbook.parse("sheet_names")["goose"][0])
+    ['Sheet1'] honk
+    """
+    def __init__(self, filepath, cache_dir=None, reader=None):
+        self.filepath = filepath
+        self.cache_dir = cache_dir if cache_dir else os.path.join(
+            os.path.dirname(os.path.abspath(filepath)),
+            ".mhdb_cache"
+        )
+        self.reader = reader if reader else pd.ExcelFile
+        self._digest = None
+        self._workbook = None
+
+    @property
+    def digest(self):
+        """
+        SHA-256 hex digest of the workbook's contents.
+        """
+        if self._digest is None:
+            self._digest = file_hash(self.filepath)
+        return(self._digest)
+
+    @property
+    def sheet_names(self):
+        """
+        List of the workbook's sheet names.
+        """
+        return(self._cached(
+            self._metadata_path("sheet_names"),
+            lambda: list(self.workbook.sheet_names)
+        ))
+
+    @property
+    def workbook(self):
+        """
+        The workbook as opened by reader, opened on first use.
+        """
+        if self._workbook is None:
+            self._workbook = self.reader(self.filepath)
+        return(self._workbook)
+
+    def cache_path(self, sheet_name, **kwargs):
+        """
+        Function to return the cache file path for a sheet and parse
+        options.
+
+        Parameters
+        ----------
+        sheet_name: string
+
+        kwargs: keyword arguments for parse
+
+        Returns
+        -------
+        path: string
+        """
+        key = hashlib.sha256(json.dumps(
+            [self.digest, pd.__version__, str(sheet_name), kwargs],
+            sort_keys=True,
+            default=repr
+        ).encode("utf-8")).hexdigest()
+        return(os.path.join(self.cache_dir, "{0}.pkl".format(key)))
+
+    def parse(self, sheet_name, **kwargs):
+        """
+        Function to parse a sheet, from the cache if possible.
+
+        Parameters
+        ----------
+        sheet_name: string
+
+        kwargs: keyword arguments for the reader's parse method, eg,
+            convert_float
+
+        Returns
+        -------
+        sheet: DataFrame
+        """
+        return(self._cached(
+            self.cache_path(sheet_name, **kwargs),
+            lambda: self.workbook.parse(sheet_name, **kwargs)
+        ))
+
+    def _cached(self, path, load):
+        if os.path.exists(path):
+            try:
+                return(pd.read_pickle(path))
+            except Exception:
+                pass
+        value = load()
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        temporary_path = "{0}.{1}.tmp".format(path, os.getpid())
+        pd.to_pickle(value, temporary_path)
+        os.replace(temporary_path, path)
+        return(value)
+
+    def _metadata_path(self, name):
+        # workbook metadata, eg, sheet names, is cached as "{key}.meta.pkl",
+        # which cache_path never returns, so no sheet name can collide
+        key = hashlib.sha256(json.dumps(
+            [self.digest, pd.__version__, name]
+        ).encode("utf-8")).hexdigest()
+        return(os.path.join(self.cache_dir, "{0}.meta.pkl".format(key)))
+
+
+class LazyWorkbook(object):
+    """
+    One workbook of a WorkbookContext. Its `parse` method parses each sheet
+    (for given parse options) on first access and memoizes it.
+
+    Parameters
+    ----------
+    context: WorkbookContext
+
+    name: string
+        name of the workbook in context
+    """
+    def __init__(self, context, name):
+        self.context = context
+        self.name = name
+
+    @property
+    def sheet_names(self):
+        """
+        List of the workbook's sheet names.
+        """
+        return(list(self.context.workbook(self.name).sheet_names))
+
+    def parse(self, sheet_name, **kwargs):
+        """
+        Function to return a parsed sheet, parsing it only on first access.
+
+        The same DataFrame is returned to every caller, so callers must not
+        modify it.
+
+        Parameters
+        ----------
+        sheet_name: string
+
+        kwargs: keyword arguments for the workbook's parse method
+
+        Returns
+        -------
+        sheet: DataFrame
+        """
+        return(self.context.sheet(self.name, sheet_name, **kwargs))
+
+
+class WorkbookContext(object):
+    """
+    Set of named workbooks shared by the functions of one build. Workbooks
+    are opened, and their sheets parsed, lazily on first access and then
+    memoized, with parse counts and times recorded for each sheet.
+
+    Parameters
+    ----------
+    workbooks: dictionary, optional
+        key: string
+            workbook name, eg, "mentalhealth", "technology" or "behavior"
+        value: string or workbook
+            path to a workbook file (opened as a CachedWorkbook) or an
+            object with a `parse(sheet_name, **kwargs)` method
+
+    cache_dir: string, optional
+        cache directory for CachedWorkbooks
+
+    schemas: dictionary, optional
+        column types to apply to each parsed sheet, keyed by (workbook
+        name, sheet name); see apply_schema. Default SHEET_SCHEMAS
+
+    Example
+    -------
+    >>> import pandas as pd
+    >>> class Workbook(object):
+    ...     sheet_names = ["Sheet1"]
+    ...     def parse(self, sheet_name, **kwargs):
+    ...         return pd.DataFrame({"goose": ["honk"]})
+    >>> context = WorkbookContext({"birds": Workbook()})
+    >>> birds = context["birds"]
+    >>> for run in range(3):
+    ...     sheet = birds.parse("Sheet1")
+    >>> print(context.parse_counts)
+    {('birds', 'Sheet1'): 1}
+    >>> print(context.report()[["workbook", "sheet", "parses"]])
+      workbook   sheet  parses
+    0    birds  Sheet1       1
+    """
+    def __init__(self, workbooks=None, cache_dir=None, schemas=None):
+        self.sources = dict(workbooks) if workbooks else {}
+        self.cache_dir = cache_dir
+        self.schemas = SHEET_SCHEMAS if schemas is None else schemas
+        self.parse_counts = {}
+        self.parse_times = {}
+        self._workbooks = {}
+        self._sheets = {}
+
+    def __contains__(self, name):
+        return(name in self.sources)
+
+    def __getitem__(self, name):
+        if name not in self.sources:
+            raise KeyError(name)
+        return(LazyWorkbook(self, name))
+
+    def add(self, name, workbook):
+        """
+        Function to add (or replace) a named workbook.
+
+        Parameters
+        ----------
+        name: string
+
+        workbook: string or workbook
+            path to a workbook file or an object with a `parse` method
+
+        Returns
+        -------
+        workbook: LazyWorkbook
+        """
+        self.sources[name] = workbook
+        self._workbooks.pop(name, None)
+        for key in [key for key in self._sheets if key[0] == name]:
+            del self._sheets[key]
+        return(self[name])
+
+    def report(self):
+        """
+        Function to tabulate parse counts and times.
+
+        Returns
+        -------
+        report: DataFrame
+            columns "workbook", "sheet", "parses" and "seconds"
+        """
+        return(pd.DataFrame(
+            [
+                {
+                    "workbook": key[0],
+                    "sheet": key[1],
+                    "parses": self.parse_counts[key],
+                    "seconds": self.parse_times[key]
+                } for key in self.parse_counts
+            ],
+            columns=["workbook", "sheet", "parses", "seconds"]
+        ))
+
+    def sheet(self, name, sheet_name, **kwargs):
+        """
+        Function to return a parsed sheet, parsing it only on first access.
+
+        Parameters
+        ----------
+        name: string
+            workbook name
+
+        sheet_name: string
+
+        kwargs: keyword arguments for the workbook's parse method
+
+        Returns
+        -------
+        sheet: DataFrame
+        """
+        key = (name, sheet_name, tuple(sorted(
+            (k, repr(v)) for k, v in kwargs.items()
+        )))
+        if key not in self._sheets:
+            start = time.perf_counter()
+            self._sheets[key] = apply_schema(
+                self.workbook(name).parse(sheet_name, **kwargs),
+                self.schemas.get((name, sheet_name), {})
+            )
+            stats_key = (name, sheet_name)
+            self.parse_counts[stats_key] = self.parse_counts.get(
+                stats_key,
+                0
+            ) + 1
+            self.parse_times[stats_key] = self.parse_times.get(
+                stats_key,
+                0.0
+            ) + time.perf_counter() - start
+        return(self._sheets[key])
+
+    def workbook(self, name):
+        """
+        Function to return the underlying workbook object, opening it on
+        first access.
+
+        Parameters
+        ----------
+        name: string
+
+        Returns
+        -------
+        workbook: CachedWorkbook or workbook
+        """
+        if name not in self._workbooks:
+            source = self.sources[name]
+            self._workbooks[name] = CachedWorkbook(
+                source,
+                self.cache_dir
+            ) if isinstance(source, str) else source
+        return(self._workbooks[name])
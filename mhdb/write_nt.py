@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+This program contains functions to write statements as N-Triples or
+N-Quads: one absolute, self-contained statement per line, so output can
+be split, concatenated, sorted and deduplicated line by line.
+
+Copyright 2018, Child Mind Institute (http://childmind.org), Apache v2.0 License
+
+"""
+import os
+import sys
+top_dir = os.path.abspath(os.path.join(
+    (__file__),
+    os.pardir,
+    os.pardir
+))
+if top_dir not in sys.path:
+    sys.path.append(top_dir)
+try:
+    from mhdb.output import open_output
+except:
+    from mhdb.mhdb.output import open_output
+import re
+
+# characters not allowed unescaped in an N-Triples IRI
+_IRI_ESCAPES = {
+    i: "%{0:02X}".format(i) for i in [
+        *range(0x21),
+        *[ord(c) for c in '<>"{}|^`\\']
+    ]
+}
+
+# Turtle literal: quoted text (triple-quoted or not), then an optional
+# language tag or datatype
+_LITERAL = re.compile(
+    r'^(?:"""(?P<long>.*)"""|"(?P<short>.*)")'
+    r'(?:@(?P<language>[A-Za-z0-9-]+)|\^\^(?P<datatype>\S+))?$',
+    re.DOTALL
+)
+
+# escape sequences to keep, and raw characters to escape, in literal text
+_LITERAL_ESCAPES = re.compile(r'\\.|["\n\r]', re.DOTALL)
+_LITERAL_REPLACEMENTS = {'"': '\\"', "\n": "\\n", "\r": "\\r"}
+
+
+def iter_ntriples(statements, prefixes, graph=None):
+    """
+    Generator of N-Triples (or, given a graph, N-Quads) lines, one per
+    statement, each ending in a newline.
+
+    Prefixed names are expanded with prefixes, "a" becomes rdf:type, and
+    Turtle literals (including triple-quoted literals) are rewritten as
+    single-line N-Triples literals.
+
+    Parameters
+    ----------
+    statements: dictionary, StatementStore or FrozenStatements
+        key: string
+            RDF subject
+        value: dictionary
+            key: string
+                RDF predicate
+            value: {string}
+                set of RDF objects
+
+    prefixes: iterable of 2-or-3-tuples
+        (prefix, namespace IRI[, import URL]) tuples, as for write_header;
+        "" is the base namespace
+
+    graph: string, optional
+        Turtle-formatted IRI of a named graph to write N-Quads into
+
+    Yields
+    ------
+    line: string
+
+    Example
+    -------
+    >>> prefixes = [
+    ...     ("mhdb", "http://www.purl.org/mentalhealth#"),
+    ...     ("rdfs", "http://www.w3.org/2000/01/rdf-schema#")
+    ... ]
+    >>> for line in iter_ntriples(
+    ...     {"mhdb:goose": {"rdfs:label": {'\"""Canada "goose"\"""@en'}}},
+    ...     prefixes
+    ... ):
+    ...     print(line, end="")
+    <http://www.purl.org/mentalhealth#goose> <http://www.w3.org/2000/01/rdf-schema#label> "Canada \\"goose\\""@en .
+    >>> for line in iter_ntriples(
+    ...     {"<http://example.com/a b>": {"a": {"mhdb:Goose"}}},
+    ...     prefixes,
+    ...     "mhdb:birds"
+    ... ):
+    ...     print(line, end="")
+    <http://example.com/a%20b> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <http://www.purl.org/mentalhealth#Goose> <http://www.purl.org/mentalhealth#birds> .
+    """
+    namespaces = nt_namespaces(prefixes)
+    terms = {}
+
+    def term(value):
+        converted = terms.get(value)
+        if converted is None:
+            converted = nt_term(value, namespaces)
+            terms[value] = converted
+        return(converted)
+
+    end = " {0} .\n".format(term(graph)) if graph else " .\n"
+    for subject, predicate, object in _triples(statements):
+        yield("{0} {1} {2}{3}".format(
+            term(subject),
+            term(predicate),
+            term(object),
+            end
+        ))
+
+
+def nt_namespaces(prefixes):
+    """
+    Function to map prefixes to namespace IRIs.
+
+    Parameters
+    ----------
+    prefixes: iterable of 2-or-3-tuples
+        (prefix, namespace IRI[, import URL]) tuples, as for write_header
+
+    Returns
+    -------
+    namespaces: dictionary
+        key: string
+            prefix
+        value: string
+            namespace IRI; "rdf" defaults to the RDF namespace
+
+    Example
+    -------
+    >>> print(nt_namespaces([("mhdb", "http://www.purl.org/mentalhealth#")]))
+    {'rdf': 'http://www.w3.org/1999/02/22-rdf-syntax-ns#', 'mhdb': 'http://www.purl.org/mentalhealth#'}
+    """
+    namespaces = {"rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#"}
+    namespaces.update({
+        prefix[0]: prefix[1] for prefix in prefixes
+    })
+    return(namespaces)
+
+
+def nt_term(term, namespaces):
+    """
+    Function to convert one Turtle-formatted term to N-Triples.
+
+    Parameters
+    ----------
+    term: string
+        Turtle-formatted IRI, prefixed name, blank node or literal
+
+    namespaces: dictionary
+        namespace IRIs by prefix, eg, from nt_namespaces
+
+    Returns
+    -------
+    term: string
+
+    Example
+    -------
+    >>> namespaces = nt_namespaces([
+    ...     ("mhdb", "http://www.purl.org/mentalhealth#"),
+    ...     ("rdfs", "http://www.w3.org/2000/01/rdf-schema#")
+    ... ])
+    >>> print(nt_term('\"""10.1109/IEEESTD\"""^^rdfs:Literal', namespaces))
+    "10.1109/IEEESTD"^^<http://www.w3.org/2000/01/rdf-schema#Literal>
+    >>> print(nt_term("_:b0", namespaces))
+    _:b0
+    >>> nt_term("goose:honk", namespaces)
+    Traceback (most recent call last):
+    ...
+    Exception: No namespace for prefix "goose" in goose:honk
+    """
+    term = term.strip()
+    if term.startswith("<") and term.endswith(">"):
+        return("<{0}>".format(term[1:-1].translate(_IRI_ESCAPES)))
+    if term.startswith('"'):
+        literal = _LITERAL.match(term)
+        if literal is None:
+            raise Exception("Malformed literal: {0}".format(term))
+        text = literal.group("long")
+        if text is None:
+            text = literal.group("short")
+        text = '"{0}"'.format(_LITERAL_ESCAPES.sub(
+            lambda match: _LITERAL_REPLACEMENTS.get(
+                match.group(0),
+                match.group(0)
+            ),
+            text
+        ))
+        if literal.group("language"):
+            return("{0}@{1}".format(text, literal.group("language")))
+        if literal.group("datatype"):
+            return("{0}^^{1}".format(
+                text,
+                nt_term(literal.group("datatype"), namespaces)
+            ))
+        return(text)
+    if term.startswith("_:"):
+        return(term)
+    if term == "a":
+        return(nt_term("rdf:type", namespaces))
+    prefix, colon, local = term.partition(":")
+    if not colon or prefix not in namespaces:
+        raise Exception("No namespace for prefix \"{0}\" in {1}".format(
+            prefix,
+            term
+        ))
+    return("<{0}>".format(
+        "".join([namespaces[prefix], local]).translate(_IRI_ESCAPES)
+    ))
+
+
+def write_nquads(
+    graphs,
+    fid,
+    prefixes,
+    buffer_size=1 << 16,
+    compression="infer"
+):
+    """
+    Function to write several statements graphs as N-Quads, each in its
+    own named graph, eg, one per source workbook.
+
+    Parameters
+    ----------
+    graphs: dictionary
+        key: string
+            Turtle-formatted IRI of a named graph
+        value: dictionary, StatementStore or FrozenStatements
+            statements in that graph
+
+    fid: file-like object or string
+        text stream with a `write` method, or a path to open with
+        open_output
+
+    prefixes: iterable of 2-or-3-tuples
+        (prefix, namespace IRI[, import URL]) tuples, as for write_header
+
+    buffer_size: int, optional
+        number of characters to collect before writing, default 65536
+
+    compression: string, optional
+        "gzip", "zstd", None or "infer" (default, from the file name) if
+        fid is a path; see open_output
+
+    Returns
+    -------
+    length: int
+        number of characters written
+
+    Example
+    -------
+    >>> import io
+    >>> fid = io.StringIO()
+    >>> length = write_nquads(
+    ...     {
+    ...         "mhdb:behavior": {"mhdb:goose": {"a": {"mhdb:Bird"}}},
+    ...         "mhdb:technology": {"mhdb:duck": {"a": {"mhdb:Bird"}}}
+    ...     },
+    ...     fid,
+    ...     [("mhdb", "http://m.org/#")]
+    ... )
+    >>> print(fid.getvalue(), end="")
+    <http://m.org/#goose> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <http://m.org/#Bird> <http://m.org/#behavior> .
+    <http://m.org/#duck> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <http://m.org/#Bird> <http://m.org/#technology> .
+    """
+    if isinstance(fid, str):
+        with open_output(fid, compression) as stream:
+            return(write_nquads(graphs, stream, prefixes, buffer_size))
+    return(sum(
+        write_ntriples(
+            graphs[graph],
+            fid,
+            prefixes,
+            graph,
+            buffer_size
+        ) for graph in graphs
+    ))
+
+
+def write_ntriples(
+    statements,
+    fid,
+    prefixes,
+    graph=None,
+    buffer_size=1 << 16,
+    compression="infer"
+):
+    """
+    Function to write statements as N-Triples (or, given a graph, N-Quads)
+    to a file-like object without building the whole document in memory.
+
+    Parameters
+    ----------
+    statements: dictionary, StatementStore or FrozenStatements
+        key: string
+            RDF subject
+        value: dictionary
+            key: string
+                RDF predicate
+            value: {string}
+                set of RDF objects
+
+    fid: file-like object or string
+        text stream with a `write` method, or a path to open with
+        open_output
+
+    prefixes: iterable of 2-or-3-tuples
+        (prefix, namespace IRI[, import URL]) tuples, as for write_header
+
+    graph: string, optional
+        Turtle-formatted IRI of a named graph to write N-Quads into
+
+    buffer_size: int, optional
+        number of characters to collect before writing (and flushing, if
+        fid can flush); default 65536
+
+    compression: string, optional
+        "gzip", "zstd", None or "infer" (default, from the file name) if
+        fid is a path; see open_output
+
+    Returns
+    -------
+    length: int
+        number of characters written
+
+    Example
+    -------
+    >>> import io
+    >>> fid = io.StringIO()
+    >>> write_ntriples(
+    ...     {"mhdb:goose": {"mhdb:chases": {"mhdb:it"}}},
+    ...     fid,
+    ...     [("mhdb", "http://m.org/#")]
+    ... )
+    66
+    >>> print(fid.getvalue(), end="")
+    <http://m.org/#goose> <http://m.org/#chases> <http://m.org/#it> .
+    """
+    if isinstance(fid, str):
+        with open_output(fid, compression) as stream:
+            return(write_ntriples(
+                statements,
+                stream,
+                prefixes,
+                graph,
+                buffer_size
+            ))
+    buffer = []
+    buffered = 0
+    length = 0
+    for line in iter_ntriples(statements, prefixes, graph):
+        buffer.append(line)
+        buffered += len(line)
+        if buffered >= buffer_size:
+            fid.write("".join(buffer))
+            if hasattr(fid, "flush"):
+                fid.flush()
+            length += buffered
+            buffer = []
+            buffered = 0
+    if buffer:
+        fid.write("".join(buffer))
+        length += buffered
+    return(length)
+
+
+def _triples(statements):
+    if hasattr(statements, "triples"):
+        return(statements.triples())
+    return(
+        (subject, predicate, object) for subject in statements for
+        predicate in statements[subject] for object in statements[
+            subject
+        ][predicate]
+    )
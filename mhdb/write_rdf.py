@@ -78,7 +78,8 @@ def build_rdf(uri_stem, rdf_type, label, comment=None,
               index=None, worksheet=None, worksheet2=None,
               equivalent_class_uri=None, subclassof_uri=None,
               property_domain=None, property_range=None,
-              exclude=[], conceptualizations={}): #, no_nan=True):
+              exclude=[], conceptualizations={},
+              positions=None): #, no_nan=True):
     """
     Build a generic RDF text document (with \" to escape for some strings).
 
@@ -115,6 +116,9 @@ def build_rdf(uri_stem, rdf_type, label, comment=None,
         exclusions
     conceptualizations : dictionary
         conceptualizaiton scheme (i.e., OWL or SKOS) for a given prefix
+    positions : dictionary, optional
+        spreadsheet_io.index_map(worksheet2), built once when calling
+        build_rdf for many rows (or use build_rdf_frame for whole worksheets)
     #no_nan : Boolean
     #    return None if NaN?
 
@@ -130,7 +134,7 @@ def build_rdf(uri_stem, rdf_type, label, comment=None,
     class_uri, subclass_uri, prop_domain, prop_range, \
     definition, definition_ref, definition_uri = get_cells(worksheet, index,
                                                            worksheet2, exclude,
-                                                           True)
+                                                           True, positions)
     #try:
     #    coding_system = get_cell(worksheet, "health-lifesci:codingSystem",
     #                            index, exclude=[], no_nan=True)
@@ -370,3 +374,184 @@ def print_general_axioms(disjoint_classes_list=[]):
 """
 
     return general_axioms_string
+
+
+def build_rdf_frame(worksheet, uri_stems, rdf_type, labels, worksheet2=None,
+                    comments=None, equivalent_class_uris=None,
+                    subclassof_uris=None, property_domains=None,
+                    property_ranges=None, exclude=[], conceptualizations={}):
+    """
+    Build the RDF text for every row of a worksheet at once.
+
+    The result is identical to concatenating `build_rdf` for each row, ie,
+    ``"".join(build_rdf(uri_stems[i], rdf_type, labels[i], comments[i], i,
+    worksheet, worksheet2, ..., exclude, conceptualizations) for i in
+    worksheet.index)``.
+
+    Parameters
+    ----------
+    worksheet : pandas dataframe
+        spreadsheet worksheet containing properties
+    uri_stems : string or list-like
+        worksheet column header or one class URI stem per row
+    rdf_type : string or list-like
+        rdf:type for all rows or one per row (see `build_rdf`)
+    labels : string or list-like
+        worksheet column header or one label per row
+    worksheet2 : pandas dataframe
+        second worksheet containing references
+    comments : string or list-like
+        comment for all rows or one per row (override worksheet)
+    equivalent_class_uris : string or list-like
+        equivalentClass URI(s) (override worksheet)
+    subclassof_uris : string or list-like
+        subClassOf URI(s) (override worksheet)
+    property_domains : string or list-like
+        property domain(s) (override worksheet)
+    property_ranges : string or list-like
+        property range(s) (override worksheet)
+    exclude : list
+        exclusions
+    conceptualizations : dictionary
+        conceptualizaiton scheme (i.e., OWL or SKOS) for a given prefix
+
+    Returns
+    -------
+    rdf_string : string
+        RDF triples
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> import pandas as pd
+    >>> worksheet = pd.DataFrame({
+    ...     "ClassName": ["goose", "skos:duck"],
+    ...     "subClassOf": [":Bird", "http://example.org/Bird"],
+    ...     "Definition": ["a \\"honking\\" bird", np.nan],
+    ...     "DefinitionReference_index": [1, np.nan]
+    ... })
+    >>> references = pd.DataFrame({
+    ...     "index": [0, 1],
+    ...     "ReferenceName": ["-", "Audubon"],
+    ...     "ReferenceLink": ["-", "http://www.audubon.org"]
+    ... })
+    >>> X = ['', 'nan', np.nan, 'None', None]
+    >>> rdf = build_rdf_frame(worksheet, "ClassName", "owl:Class",
+    ...                       "ClassName", references, exclude=X,
+    ...                       conceptualizations={"skos": "SKOS"})
+    >>> print(rdf.split("\\n\\n")[0])
+    <BLANKLINE>
+    ### goose
+    :goose rdf:type owl:Class ;
+        rdfs:label \"\"\"goose\"\"\"^^rdfs:Literal ;
+        rdfs:comment \"\"\"a \\'honking\\' bird [from: Audubon]\"\"\"^^rdfs:Literal ;
+        rdfs:isDefinedBy "<http://www.audubon.org>"^^rdfs:Literal ;
+        rdfs:subClassOf :Bird .
+    >>> rdf == "".join(build_rdf(
+    ...     worksheet["ClassName"][i], "owl:Class", worksheet["ClassName"][i],
+    ...     None, i, worksheet, references, exclude=X,
+    ...     conceptualizations={"skos": "SKOS"}
+    ... ) for i in worksheet.index)
+    True
+
+    """
+    from mhdb.spreadsheet_io import return_string, get_cells_frame
+    import pandas as pd
+
+    def per_row(values, header=False):
+        if header and isinstance(values, str):
+            return worksheet[values].astype(object)
+        if isinstance(values, str) or values is None or \
+                not hasattr(values, '__len__'):
+            return pd.Series([values] * len(worksheet), index=worksheet.index,
+                             dtype=object)
+        return pd.Series(list(values), index=worksheet.index, dtype=object)
+
+    def excluded(values):
+        return pd.Series([value in exclude for value in values],
+                         index=values.index, dtype=bool)
+
+    def override(values, worksheet_values):
+        values = per_row(values)
+        return values.where(~excluded(values), worksheet_values)
+
+    def escaped(values, *args):
+        return values.map(lambda value: return_string(value, *args))
+
+    def relations(values, gen_rel):
+        r_cons = cached(values, lambda r: owl_or_skos(r, conceptualizations))
+        return pd.Series([
+            conceptClass[l_con][gen_rel] if l_con == r_con else "rdfs:label"
+            for l_con, r_con in zip(l_cons[values.index], r_cons)
+        ], index=values.index, dtype=object)
+
+    def cached(values, function):
+        memo = {}
+        results = []
+        for value in values:
+            if value not in memo:
+                memo[value] = function(value)
+            results.append(memo[value])
+        return pd.Series(results, index=values.index, dtype=object)
+
+    cells = get_cells_frame(worksheet, worksheet2, exclude, True)
+    uri_stems = per_row(uri_stems, True)
+    labels = per_row(labels, True)
+    rdf_types = per_row(rdf_type)
+    comments = override(comments, cells['definition'])
+    equivalent_class_uris = override(equivalent_class_uris,
+                                     cells['equivalent_class_uri'])
+    subclassof_uris = override(subclassof_uris, cells['subclassof_uri'])
+    property_domains = override(property_domains, cells['property_domain'])
+    property_ranges = override(property_ranges, cells['property_range'])
+    is_object_property = rdf_types == 'owl:ObjectProperty'
+    l_cons = cached(uri_stems, lambda u: owl_or_skos(u, conceptualizations))
+    empty = pd.Series([""] * len(worksheet), index=worksheet.index,
+                      dtype=object)
+
+    rdf = "\n### " + labels.map(str) + "\n" + \
+          uri_stems.map(lambda u: "" if ":" in u else ":") + \
+          uri_stems + " rdf:type " + rdf_types.map(str) + " "
+
+    keep = ~excluded(labels)
+    rdf += (";\n    rdfs:label \"\"\"" + labels[keep].map(
+        lambda label: label if not label[-1] == "\"" else "".join(
+            [label[:-1], "\\\""])
+    ) + "\"\"\"^^rdfs:Literal ").reindex(worksheet.index, fill_value="")
+
+    keep = ~excluded(comments)
+    refstrings = (" [from: " + escaped(cells['definition_ref'], ['"'], ["'"]) +
+                  "]").where(~excluded(cells['definition_ref']), "")
+    rdf += (";\n    rdfs:comment \"\"\"" + escaped(comments, ['"'], ["'"]) +
+            refstrings + "\"\"\"^^rdfs:Literal ").where(keep, "")
+
+    keep = ~excluded(cells['definition_ref_uri'])
+    rdf += (";\n    rdfs:isDefinedBy \"" +
+            escaped(cells['definition_ref_uri']) +
+            "\"^^rdfs:Literal ").where(keep, "")
+
+    keep = ~excluded(equivalent_class_uris)
+    equivalents = empty.copy()
+    equivalents[keep] = relations(equivalent_class_uris[keep], "equivalence")
+    rdf += (equivalents.map(lambda rel: ";\n    " + rel).where(
+        ~is_object_property, ";\n        owl:equivalentProperty"
+    ) + " " + escaped(equivalent_class_uris) + " ").where(keep, "")
+
+    keep = ~excluded(subclassof_uris)
+    subtypes = empty.copy()
+    subtypes[keep] = relations(subclassof_uris[keep], "subtype")
+    subclassof_uris = subclassof_uris.where(~keep, subclassof_uris[keep].map(
+        lambda uri: return_string(uri) if (
+            not uri.startswith(':') and "//" in uri) else uri))
+    rdf += (";\n    " + subtypes.where(
+        ~is_object_property, "rdfs:subPropertyOf"
+    ) + " " + escaped(subclassof_uris) + " ").where(keep, "")
+
+    for prop, values in [("rdfs:domain", property_domains),
+                         ("rdfs:range", property_ranges)]:
+        rdf += (";\n    " + prop + " :" + escaped(values) + " ").where(
+            ~excluded(values), "")
+
+    rdf += ".\n"
+
+    return "".join(rdf)
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+This program contains functions to serialize a statements graph in
+parallel: subjects are partitioned into shards, each shard is rendered in
+a worker process, and the shards are written as separate files with a
+manifest or assembled into one file.
+
+Copyright 2018, Child Mind Institute (http://childmind.org), Apache v2.0 License
+
+"""
+import os
+import sys
+top_dir = os.path.abspath(os.path.join(
+    (__file__),
+    os.pardir,
+    os.pardir
+))
+if top_dir not in sys.path:
+    sys.path.append(top_dir)
+try:
+    from mhdb.output import compressed_path, open_output
+    from mhdb.write_nt import write_ntriples
+    from mhdb.write_ttl import write_turtle
+except:
+    from mhdb.mhdb.output import compressed_path, open_output
+    from mhdb.mhdb.write_nt import write_ntriples
+    from mhdb.mhdb.write_ttl import write_turtle
+from concurrent.futures import ProcessPoolExecutor
+import json
+import multiprocessing
+import shutil
+import zlib
+
+FORMATS = {
+    "ntriples": ".nt",
+    "turtle": ".ttl"
+}
+
+# (statements, subject lists, shard paths, format, prefixes, compact,
+# compression) in a worker process; see _share
+_shared = None
+
+
+def shard_subjects(statements, shards, by="hash"):
+    """
+    Function to assign each subject of a statements graph to a shard.
+
+    A subject's shard is the CRC-32 of the subject (by="hash") or of its
+    namespace prefix (by="prefix"; "<" for full IRIs) modulo shards, so it
+    is the same in every process and every run. Each subject is hashed
+    once; its statements are not read or copied.
+
+    Parameters
+    ----------
+    statements: dictionary, StatementStore or FrozenStatements
+        key: string
+            RDF subject
+        value: dictionary
+            key: string
+                RDF predicate
+            value: {string}
+                set of RDF objects
+
+    shards: int
+        number of shards
+
+    by: string, optional
+        "hash" (default) or "prefix"
+
+    Returns
+    -------
+    subjects: list of lists
+        one list of subjects per shard, in their order in statements
+
+    Example
+    -------
+    >>> subjects = shard_subjects({
+    ...     "mhdb:goose": {"mhdb:chases": {"mhdb:it"}},
+    ...     "mhdb:duck": {"mhdb:sits": {"mhdb:still"}},
+    ...     "<http://example.com/swan>": {"mhdb:glides": {"mhdb:by"}}
+    ... }, 2, by="prefix")
+    >>> for shard in subjects:
+    ...     print(shard)
+    ['<http://example.com/swan>']
+    ['mhdb:goose', 'mhdb:duck']
+    """
+    if by not in ("hash", "prefix"):
+        raise Exception(
+            "Unknown partition \"{0}\"; expected \"hash\" or "
+            "\"prefix\"".format(by)
+        )
+    subjects = [[] for shard in range(shards)]
+    for subject in statements:
+        key = subject if by == "hash" else (
+            "<" if subject.startswith("<") else subject.split(":")[0]
+        )
+        subjects[zlib.crc32(key.encode("utf-8")) % shards].append(subject)
+    return(subjects)
+
+
+def write_shards(
+    statements,
+    path,
+    shards=4,
+    format="turtle",
+    header=None,
+    prefixes=None,
+    by="hash",
+    assemble=False,
+    max_workers=None,
+    compact=False,
+    compression=None
+):
+    """
+    Function to render a statements graph in shards in worker processes and
+    write them.
+
+    Only each shard's list of subjects is handed out: workers read the
+    statements themselves, inherited from this process where processes
+    are forked and otherwise pickled once per worker.
+
+    Unless assemble, "{stem}-{i:05d}-of-{shards:05d}{ext}" shard files are
+    written beside path with "{stem}-header{ext}" (if header) and a
+    "{stem}.manifest.json" manifest listing them; a Turtle shard is read
+    after the header. If assemble, path gets the header once and then each
+    shard in shard order.
+
+    Parameters
+    ----------
+    statements: dictionary, StatementStore or FrozenStatements
+        key: string
+            RDF subject
+        value: dictionary
+            key: string
+                RDF predicate
+            value: {string}
+                set of RDF objects
+
+    path: string
+        output path, eg, "behavior.ttl"
+
+    shards: int, optional
+        number of shards, default 4
+
+    format: string, optional
+        "turtle" (default) or "ntriples"
+
+    header: string, optional
+        text to write once before the statements, eg, from write_header
+
+    prefixes: iterable of 2-or-3-tuples, optional
+        (prefix, namespace IRI[, import URL]) tuples; required for
+        "ntriples", and used to abbreviate full IRIs in "turtle"
+
+    by: string, optional
+        subject partition, "hash" (default) or "prefix"; see
+        shard_subjects
+
+    assemble: Boolean, optional
+        write one file instead of shard files and a manifest
+
+    max_workers: int, optional
+        number of worker processes, default the number of CPUs (at most
+        shards); 1 renders the shards in this process
+
+    compact: Boolean, optional
+        write Turtle objects in " , " lists; see iter_turtle
+
+    compression: string, optional
+        "gzip" or "zstd" to compress every file as it is written, adding
+        ".gz" or ".zst" to its name; default None
+
+    Returns
+    -------
+    manifest: dictionary
+        "format", "partition", "compression", "header" and "shards", a list of
+        {"path", "subjects", "triples"} dictionaries (each path relative to
+        the manifest); "path" too if assemble
+
+    Example
+    -------
+    >>> import os
+    >>> import tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), "birds.ttl")
+    >>> statements = {
+    ...     "mhdb:goose": {"mhdb:chases": {"mhdb:it"}},
+    ...     "mhdb:duck": {"mhdb:sits": {"mhdb:still"}}
+    ... }
+    >>> manifest = write_shards(
+    ...     statements,
+    ...     path,
+    ...     shards=2,
+    ...     header="@prefix mhdb: <http://m.org/#> .\\n\\n",
+    ...     max_workers=1
+    ... )
+    >>> print(sorted(os.listdir(os.path.dirname(path))))
+    ['birds-00000-of-00002.ttl', 'birds-00001-of-00002.ttl', 'birds-header.ttl', 'birds.manifest.json']
+    >>> print([shard["triples"] for shard in manifest["shards"]])
+    [1, 1]
+    >>> manifest = write_shards(
+    ...     statements,
+    ...     path,
+    ...     shards=2,
+    ...     header="@prefix mhdb: <http://m.org/#> .\\n\\n",
+    ...     assemble=True,
+    ...     max_workers=2
+    ... )
+    >>> with open(path) as fid:
+    ...     print(fid.read().strip())
+    @prefix mhdb: <http://m.org/#> .
+    <BLANKLINE>
+    mhdb:duck mhdb:sits mhdb:still .
+    <BLANKLINE>
+    mhdb:goose mhdb:chases mhdb:it .
+    >>> print([
+    ...     name for name in os.listdir(os.path.dirname(path)) if
+    ...     name.endswith(".tmp")
+    ... ])
+    []
+    >>> import gzip
+    >>> manifest = write_shards(
+    ...     statements,
+    ...     path,
+    ...     shards=2,
+    ...     assemble=True,
+    ...     max_workers=1,
+    ...     compression="gzip"
+    ... )
+    >>> with gzip.open(path + ".gz", "rt") as fid:
+    ...     print(fid.read().strip())
+    mhdb:duck mhdb:sits mhdb:still .
+    <BLANKLINE>
+    mhdb:goose mhdb:chases mhdb:it .
+    """
+    if format not in FORMATS:
+        raise Exception("Unknown format \"{0}\"; expected one of {1}".format(
+            format,
+            ", ".join(FORMATS)
+        ))
+    subjects = shard_subjects(statements, shards, by)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, shards))
+    directory, filename = os.path.split(path)
+    stem, extension = os.path.splitext(filename)
+    extension = extension if extension else FORMATS[format]
+    manifest = {
+        "format": format,
+        "partition": "crc32-{0}".format(by),
+        "compression": compression,
+        "header": None,
+        "shards": []
+    }
+    if assemble:
+        path = compressed_path(path, compression)
+        manifest["path"] = os.path.basename(path)
+        shard_paths = [
+            "{0}.{1}.{2}.tmp".format(path, os.getpid(), shard) for shard in
+            range(shards)
+        ]
+    else:
+        shard_paths = [
+            os.path.join(directory, compressed_path(
+                "{0}-{1:05d}-of-{2:05d}{3}".format(
+                    stem,
+                    shard,
+                    shards,
+                    extension
+                ),
+                compression
+            )) for shard in range(shards)
+        ]
+    header_path = None
+    if header:
+        header_path = "{0}.{1}.header.tmp".format(
+            path,
+            os.getpid()
+        ) if assemble else os.path.join(directory, compressed_path(
+            "{0}-header{1}".format(stem, extension),
+            compression
+        ))
+    state = (
+        statements,
+        subjects,
+        shard_paths,
+        format,
+        prefixes,
+        compact,
+        compression
+    )
+    try:
+        if max_workers == 1:
+            counts = [_write_shard(shard, state) for shard in range(shards)]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context(
+                    "fork"
+                ) if "fork" in multiprocessing.get_all_start_methods(
+                ) else None,
+                initializer=_share,
+                initargs=(state,)
+            ) as executor:
+                counts = list(executor.map(_write_shard, range(shards)))
+        if header_path:
+            with open_output(header_path, compression) as fid:
+                fid.write(header)
+        if assemble:
+            # compressed pieces concatenate into one valid gzip or zstd file
+            with open(path, "wb") as fid:
+                for piece in [header_path, *shard_paths] if header_path else \
+                        shard_paths:
+                    with open(piece, "rb") as piece_fid:
+                        shutil.copyfileobj(piece_fid, fid)
+    finally:
+        if assemble:
+            for piece in [header_path, *shard_paths]:
+                if piece and os.path.exists(piece):
+                    os.remove(piece)
+    manifest["shards"] = [
+        {
+            "path": manifest["path"] if assemble else os.path.basename(
+                shard_path
+            ),
+            "subjects": shard_count[0],
+            "triples": shard_count[1]
+        } for shard_path, shard_count in zip(shard_paths, counts)
+    ]
+    if assemble:
+        return(manifest)
+    if header_path:
+        manifest["header"] = os.path.basename(header_path)
+    with open(
+        os.path.join(directory, "{0}.manifest.json".format(stem)),
+        "w"
+    ) as fid:
+        json.dump(manifest, fid, indent=2)
+    return(manifest)
+
+
+def write_shard(
+    statements,
+    path,
+    format="turtle",
+    prefixes=None,
+    compact=False,
+    compression=None
+):
+    """
+    Function to write one shard, streaming it through open_output.
+
+    Parameters
+    ----------
+    statements: dictionary, StatementStore or FrozenStatements
+        statements to write, eg, one shard's subjects
+
+    path: string
+
+    format: string, optional
+        "turtle" (default) or "ntriples"
+
+    prefixes: iterable of 2-or-3-tuples, optional
+        (prefix, namespace IRI[, import URL]) tuples to expand prefixed
+        names with ("ntriples"; required) or abbreviate full IRIs with
+        ("turtle")
+
+    compact: Boolean, optional
+        write Turtle objects in " , " lists; see iter_turtle
+
+    compression: string, optional
+        "gzip", "zstd" or None (default); see open_output
+
+    Returns
+    -------
+    length: int
+        number of characters written (before compression); Turtle
+        subjects are followed by a blank line, so shards concatenate
+    """
+    if format not in FORMATS:
+        raise Exception("Unknown format \"{0}\"; expected one of {1}".format(
+            format,
+            ", ".join(FORMATS)
+        ))
+    with open_output(path, compression) as fid:
+        if format == "ntriples":
+            return(write_ntriples(statements, fid, prefixes))
+        length = write_turtle(
+            statements,
+            fid,
+            compact=compact,
+            prefixes=prefixes
+        )
+        if length:
+            length += fid.write("\n\n")
+        return(length)
+
+
+def _share(state):
+    global _shared
+    _shared = state
+
+
+def _write_shard(shard, state=None):
+    statements, subjects, paths, format, prefixes, compact, compression = (
+        _shared if state is None else state
+    )
+    view = {subject: statements[subject] for subject in subjects[shard]}
+    write_shard(view, paths[shard], format, prefixes, compact, compression)
+    return((
+        len(view),
+        sum(
+            len(predicates[predicate]) for predicates in view.values() for
+            predicate in predicates
+        )
+    ))
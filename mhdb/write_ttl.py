@@ -19,15 +19,158 @@ top_dir = os.path.abspath(os.path.join(
 if top_dir not in sys.path:
     sys.path.append(top_dir)
 try:
+    from mhdb.output import open_output
     from mhdb.spreadsheet_io import convert_string_to_label, return_string
 except:
+    from mhdb.mhdb.output import open_output
     from mhdb.mhdb.spreadsheet_io import convert_string_to_label, return_string
 import numpy as np
+import pandas as pd
+import re
+from collections import Counter
+from functools import lru_cache
+
+_registries = {}
+
+# local part of a prefixed name that needs no escaping
+_LOCAL_NAME = re.compile(r"^[A-Za-z0-9_](?:[A-Za-z0-9_.-]*[A-Za-z0-9_-])?$")
+
+
+class PrefixRegistry(object):
+    """
+    Set of known Turtle prefixes with a precompiled matcher for
+    classifying IRIs, built from the same (prefix, iri[, import URL])
+    tuples that write_header and write_header_prefixes take.
+
+    IRIs with an unknown prefix are counted in `unknown`.
+
+    Parameters
+    ----------
+    prefixes: iterable of 2-or-3-tuples, optional
+
+    Example
+    -------
+    >>> registry = PrefixRegistry([("mhdb", "http://www.purl.org/mentalhealth#")])
+    >>> print(registry.check_iris([
+    ...     "mhdb:goose",
+    ...     "Canada goose",
+    ...     "http://example.com/goose",
+    ...     "goose:honk",
+    ...     "goose:hiss",
+    ...     "duck:quack:"
+    ... ]))
+    ['mhdb:goose', 'mhdb:Canada_goose', '<http://example.com/goose>', 'goose:honk', 'goose:hiss', 'duck:quack']
+    >>> print(registry.summary())
+    unknown prefixes: goose (2), duck (1)
+    """
+    def __init__(self, prefixes=None):
+        self.prefixes = tuple(prefixes) if prefixes else ()
+        self.prefix_strings = frozenset({
+            "",
+            "_",
+            *[prefix[0] for prefix in self.prefixes]
+        })
+        self._matcher = re.compile("(?:{0}):".format("|".join(
+            re.escape(prefix) for prefix in sorted(self.prefix_strings)
+        )))
+        self.unknown = Counter()
+        self._terms = {}
+
+    def check_iri(self, iri, alert_unknown=False):
+        """
+        Function to format an IRI by type, as check_iri does.
+
+        Parameters
+        ----------
+        iri: string
+
+        alert_unknown: Boolean, optional
+            print each unknown prefix as it is found
+
+        Returns
+        -------
+        iri: string
+        """
+        iri = str(iri)
+        classified = self._terms.get(iri)
+        if classified is None:
+            classified = self._classify(iri)
+            if len(self._terms) >= 1 << 16:
+                self._terms.clear()
+            self._terms[iri] = classified
+        iri, prefix = classified
+        if prefix is not None:
+            self.unknown[prefix] += 1
+            if alert_unknown:
+                print("unknown prefix: {0}".format(prefix))
+        return(iri)
+
+    def check_iris(self, iris):
+        """
+        Function to format many IRIs by type, classifying each distinct
+        value once.
+
+        Parameters
+        ----------
+        iris: iterable of strings or Series
+
+        Returns
+        -------
+        iris: list of strings or Series
+            Series (with the same index) if iris is a Series
+        """
+        values = iris.map(str) if isinstance(
+            iris,
+            pd.Series
+        ) else [str(iri) for iri in iris]
+        terms = {}
+        for iri, count in Counter(values).items():
+            terms[iri], prefix = self._classify(iri)
+            if prefix is not None:
+                self.unknown[prefix] += count
+        if isinstance(values, pd.Series):
+            return(values.map(terms))
+        return([terms[iri] for iri in values])
+
+    def summary(self, unknown=None):
+        """
+        Function to summarize the unknown prefixes found so far.
+
+        Parameters
+        ----------
+        unknown: Counter, optional
+            unknown prefix counts to summarize instead of `unknown`
+
+        Returns
+        -------
+        summary: string
+            empty if no unknown prefixes were found
+        """
+        unknown = self.unknown if unknown is None else unknown
+        if not unknown:
+            return("")
+        return("unknown prefixes: {0}".format(", ".join(
+            "{0} ({1})".format(prefix, count) for prefix, count in
+            unknown.most_common()
+        )))
+
+    def _classify(self, iri):
+        if ":" in iri and ": " not in iri:
+            iri = iri.rstrip(":")
+            if ":" not in iri:
+                return(mhdb_iri(iri), None)
+            elif self._matcher.match(iri):
+                return(iri, None)
+            elif ":/" in iri:
+                return("<{0}>".format(iri), None)
+            return(iri.strip(), iri.split(":")[0])
+        else:
+            return(mhdb_iri(iri), None)
 
 
 def check_iri(
     iri,
-    prefixes={("mhdb", "http://www.purl.org/mentalhealth#")},
+    prefixes=frozenset({("mhdb", "http://www.purl.org/mentalhealth#")}),
     alert_unknown=False):
     """
     Function to format IRIs by type
@@ -38,28 +181,57 @@ def check_iri(
 
     prefixes: set of 2-or-3-tuples
 
+    alert_unknown: Boolean, optional
+        print unknown prefixes
+
     Returns
     -------
     iri: string
     """
-    iri = str(iri)
-    prefix_strings = {"","_"} if not prefixes else {
-        "",
-        "_",
-        *[prefix[0] for prefix in prefixes]
-    }
-    if ":" in iri and ": " not in iri:
-        if iri.endswith(":"):
-            return(check_iri(iri[:-1], prefixes))
-        elif iri.split(":")[0] in prefix_strings:
-            return(iri)
-        elif ":/" in iri:
-            return("<{0}>".format(iri))
-        if alert_unknown:
-            print("unknown prefix: {0}".format(iri.split(":")[0]))
-        return(iri.strip())
-    else:
-        return(mhdb_iri(iri))
+    return(prefix_registry(prefixes).check_iri(iri, alert_unknown))
+
+
+def check_iris(
+    iris,
+    prefixes=frozenset({("mhdb", "http://www.purl.org/mentalhealth#")}),
+    alert_unknown=False
+):
+    """
+    Function to format many IRIs by type, reporting unknown prefixes in
+    one summary instead of once per IRI.
+
+    Parameters
+    ----------
+    iris: iterable of strings or Series
+
+    prefixes: set of 2-or-3-tuples
+
+    alert_unknown: Boolean, optional
+        print a summary of the unknown prefixes in this batch
+
+    Returns
+    -------
+    iris: list of strings or Series
+        Series (with the same index) if iris is a Series
+
+    Example
+    -------
+    >>> import pandas as pd
+    >>> iris = check_iris(
+    ...     pd.Series(["goose", "goose:honk", "goose:honk"], index=[3, 5, 7]),
+    ...     alert_unknown=True
+    ... )
+    unknown prefixes: goose (2)
+    >>> print(iris.to_dict())
+    {3: 'mhdb:goose', 5: 'goose:honk', 7: 'goose:honk'}
+    """
+    registry = prefix_registry(prefixes)
+    before = Counter(registry.unknown)
+    terms = registry.check_iris(iris)
+    unknown = registry.unknown - before
+    if alert_unknown and unknown:
+        print(registry.summary(unknown))
+    return(terms)
 
 
 def language_string(s, lang="en"):
@@ -82,23 +254,106 @@ def language_string(s, lang="en"):
     -------
     >>> print(language_string("Canada goose"))
     \"""Canada goose\"""@en
+    >>> print(language_string(' "honk" ' + chr(92) + ' hiss' + chr(10) + chr(7)))
+    \"""\\'honk\\' \\\\ hiss \\u0007\"""@en
     """
     return(
         "\"\"\"{0}\"\"\"@{1}".format(
-            return_string(
-                s,
-                [
-                    '"'
-                ],
-                [
-                    "'"
-                ]
-            ),
+            turtle_escape(s, "\\'") if s else "",
             lang
         )
     )
 
 
+def language_strings(series, lang="en"):
+    """
+    Function to encode each value in a Series as a literal in a specific
+    language, as language_string does.
+
+    Parameters
+    ----------
+    series : Series
+
+    lang : string
+        ISO character code, default="en"
+
+    Returns
+    -------
+    literals : Series
+        triple quoted Turtle literals with language encoding, with the same
+        index as series; missing values become empty literals
+
+    Example
+    -------
+    >>> import pandas as pd
+    >>> for literal in language_strings(pd.Series(
+    ...     ["Canada goose", "http://example.com/goose", None]
+    ... )):
+    ...     print(literal)
+    \"""Canada goose\"""@en
+    \"""<http://example.com/goose>\"""@en
+    \"""\"""@en
+    """
+    literals = {}
+    for value in series.unique():
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            continue
+        literals[value] = language_string(value, lang)
+    return(series.map(literals).fillna(language_string("", lang)).astype(
+        object
+    ))
+
+
+def turtle_escape(s, quote="\\\""):
+    """
+    Function to escape a string for a Turtle literal in one pass.
+
+    Strings containing "://" are wrapped in angle brackets (as
+    return_string does), the result is stripped, newlines become spaces,
+    and backslashes, double quotes and other control characters are
+    escaped. Results are memoized.
+
+    Parameters
+    ----------
+    s : string
+
+    quote : string
+        replacement for a double quote, default '\\"'
+
+    Returns
+    -------
+    s : string
+
+    Example
+    -------
+    >>> print(turtle_escape("C:" + chr(92) + "goose" + chr(9) + '"honk"'))
+    C:\\\\goose\\t\\"honk\\"
+    """
+    return(_turtle_escape(str(s), quote))
+
+
+@lru_cache(maxsize=1 << 16)
+def _turtle_escape(s, quote):
+    if "://" in s and not s.startswith("<"):
+        s = "<{0}>".format(s)
+    return(s.strip().translate(_escape_table(quote)))
+
+
+@lru_cache(maxsize=8)
+def _escape_table(quote):
+    table = {
+        i: "\\u{0:04X}".format(i) for i in [*range(0x20), 0x7F]
+    }
+    table.update({
+        ord("\t"): "\\t",
+        ord("\n"): " ",
+        ord("\r"): "\\r",
+        ord('"'): quote,
+        ord("\\"): "\\\\"
+    })
+    return(table)
+
+
 def mhdb_iri(label):
     """
     Function to prepend "mhdb:" to label or string
@@ -117,7 +372,240 @@ def mhdb_iri(label):
     ]))
 
 
-def turtle_from_dict(ttl_dict):
+def prefix_registry(prefixes):
+    """
+    Function to return the shared PrefixRegistry for a collection of
+    prefixes, building it on first use.
+
+    Parameters
+    ----------
+    prefixes: iterable of 2-or-3-tuples
+
+    Returns
+    -------
+    registry: PrefixRegistry
+    """
+    if isinstance(prefixes, (frozenset, tuple)):
+        cached = _registries.get(id(prefixes))
+        if cached is not None and cached[0] is prefixes:
+            return(cached[1])
+        registry = _prefix_registry(frozenset(prefixes))
+        if len(_registries) >= 32:
+            _registries.clear()
+        _registries[id(prefixes)] = (prefixes, registry)
+        return(registry)
+    return(_prefix_registry(frozenset(prefixes) if prefixes else frozenset()))
+
+
+@lru_cache(maxsize=32)
+def _prefix_registry(prefixes):
+    return(PrefixRegistry(sorted(prefixes, key=lambda prefix: prefix[0])))
+
+
+def derive_prefixes(ttl_dict, prefixes=None, min_count=2, max_prefixes=32):
+    """
+    Function to derive prefixes for the namespaces of the full IRIs most
+    often seen in a statements graph, to abbreviate them with.
+
+    A full IRI's namespace is everything up to its last "/" or "#". Each
+    new prefix is named for the namespace's domain (eg, "doi" for
+    "https://dx.doi.org/...") and numbered if that name is taken.
+
+    Parameters
+    ----------
+    ttl_dict: dictionary, StatementStore or FrozenStatements
+        key: string
+            RDF subject
+        value: dictionary
+            key: string
+                RDF predicate
+            value: {string}
+                set of RDF objects
+
+    prefixes: iterable of 2-or-3-tuples, optional
+        prefixes already in use, eg, for write_header
+
+    min_count: int, optional
+        number of abbreviable IRIs a namespace needs, default 2
+
+    max_prefixes: int, optional
+        greatest number of prefixes to derive, default 32
+
+    Returns
+    -------
+    prefixes: list of 3-tuples
+        new (prefix, namespace IRI, None) tuples, most frequent first, to
+        pass to write_header or write_header_prefixes (which do not import
+        them) and the turtle writers
+
+    Example
+    -------
+    >>> print(derive_prefixes({
+    ...     "<https://dx.doi.org/10.1109/A>": {"rdfs:label": {"doi:x"}},
+    ...     "<https://dx.doi.org/10.1109/B>": {"rdfs:label": {"mhdb:y"}},
+    ...     "<http://one.org/>": {"rdfs:seeAlso": {"<http://ex.org/a>"}}
+    ... }))
+    [('doi1', 'https://dx.doi.org/10.1109/', None)]
+    """
+    prefixes = list(prefixes) if prefixes else []
+    namespaces = {prefix[1] for prefix in prefixes}
+    taken = {prefix[0] for prefix in prefixes}
+    counts = Counter()
+    if hasattr(ttl_dict, "triples"):
+        triples = ttl_dict.triples()
+    else:
+        triples = (
+            (subject, predicate, object) for subject in ttl_dict for
+            predicate in ttl_dict[subject] for object in ttl_dict[
+                subject
+            ][predicate]
+        )
+    terms = Counter()
+    for triple in triples:
+        terms.update(triple)
+    for term, count in terms.items():
+        if term.startswith("<"):
+            namespace, local = _split_iri(term)
+            if namespace and namespace not in namespaces:
+                counts[namespace] += count
+        elif ":" in term and not term.startswith('"'):
+            taken.add(term.split(":")[0])
+    derived = []
+    for namespace, count in sorted(
+        counts.items(),
+        key=lambda item: (-item[1], item[0])
+    ):
+        if count < min_count or len(derived) >= max_prefixes:
+            break
+        labels = [
+            label for label in re.split(
+                r"[^A-Za-z0-9]+",
+                namespace.split("://", 1)[-1].split("/")[0]
+            ) if label and label != "www"
+        ]
+        name = labels[-2] if len(labels) > 1 else (
+            labels[0] if labels else "ns"
+        )
+        name = name.lower() if name[0].isalpha() else "ns{0}".format(name)
+        prefix = name
+        number = 0
+        while prefix in taken:
+            number += 1
+            prefix = "{0}{1}".format(name, number)
+        taken.add(prefix)
+        derived.append((prefix, namespace, None))
+    return(derived)
+
+
+def _abbreviator(prefixes):
+    namespaces = {
+        prefix[1]: prefix[0] for prefix in prefixes if isinstance(
+            prefix[1],
+            str
+        ) and prefix[1].endswith(("/", "#"))
+    }
+    terms = {}
+
+    def abbreviate(term):
+        abbreviated = terms.get(term)
+        if abbreviated is None:
+            abbreviated = term
+            if term.startswith("<"):
+                namespace, local = _split_iri(term)
+                if namespace in namespaces:
+                    abbreviated = "{0}:{1}".format(namespaces[namespace], local)
+            if len(terms) >= 1 << 16:
+                terms.clear()
+            terms[term] = abbreviated
+        return(abbreviated)
+
+    return(abbreviate)
+
+
+def _split_iri(term):
+    # (namespace, local name) of a full IRI "<...>", or (None, None) if it
+    # cannot be written as a prefixed name
+    iri = term[1:-1]
+    split = max(iri.rfind("/"), iri.rfind("#")) + 1
+    scheme = iri.find("://")
+    if scheme > 0 and split > scheme + 3 and _LOCAL_NAME.match(iri[split:]):
+        return(iri[:split], iri[split:])
+    return(None, None)
+
+
+def iter_turtle(ttl_dict, compact=False, prefixes=None):
+    """
+    Generator of Terse Triple Language chunks, one per subject, that
+    concatenate to `turtle_from_dict`'s string
+
+    Parameters
+    ----------
+    ttl_dict: dictionary
+        key: string
+            RDF subject
+        value: dictionary
+            key: string
+                RDF predicate
+            value: {string}
+                set of RDF objects
+
+    compact: Boolean, optional
+        write each predicate once, with its objects separated by " , "
+
+    prefixes: iterable of 2-or-3-tuples, optional
+        (prefix, namespace IRI[, import URL]) tuples; full IRIs in a
+        namespace ending in "/" or "#" are written as prefixed names
+
+    Yields
+    ------
+    ttl_string: str
+        ttl for one subject, preceded by a blank line for all but the first
+
+    Example
+    -------
+    >>> list(iter_turtle({
+    ...     "duck": {"continues": {"sitting"}},
+    ...     "goose": {"begins": {"chasing"}}
+    ... }))
+    ['duck continues sitting .', '\\n\\ngoose begins chasing .']
+    >>> list(iter_turtle(
+    ...     {"<http://ex.org/duck>": {
+    ...         "mhdb:sees": ["<http://ex.org/goose>", "mhdb:it"]
+    ...     }},
+    ...     compact=True,
+    ...     prefixes=[("ex", "http://ex.org/")]
+    ... ))
+    ['ex:duck mhdb:sees ex:goose , mhdb:it .']
+    """
+    term = _abbreviator(prefixes) if prefixes else str
+    separator = ""
+    for subject in ttl_dict:
+        predicates = ttl_dict[subject]
+        yield(
+            "{0}{1} {2} .".format(
+                separator,
+                term(subject),
+                " ;\n\t".join([
+                    "{0} {1}".format(
+                        term(predicate),
+                        " , ".join([
+                            term(object) for object in predicates[predicate]
+                        ])
+                    ) for predicate in predicates
+                ] if compact else [
+                    "{0} {1}".format(
+                        term(predicate),
+                        term(object)
+                    ) for predicate in predicates for object in predicates[
+                        predicate
+                    ]
+                ])
+            )
+        )
+        separator = "\n\n"
+
+
+def turtle_from_dict(ttl_dict, compact=False, prefixes=None):
     """
     Function to convert a dictionary to a Terse Triple Language string
 
@@ -132,6 +620,12 @@ def turtle_from_dict(ttl_dict):
             value: {string}
                 set of RDF objects
 
+    compact: Boolean, optional
+        write each predicate once, with its objects separated by " , "
+
+    prefixes: iterable of 2-or-3-tuples, optional
+        prefixes to abbreviate full IRIs with; see iter_turtle
+
     Returns
     -------
     ttl_string: str
@@ -153,32 +647,93 @@ def turtle_from_dict(ttl_dict):
     ... })
     'duck continues sitting .\\n\\ngoose begins chasing .'
     """
-    x = [
-        "mhdb:None",
-        "mhdb:nan",
-        "nan",
-        np.nan,
-        None
-    ]
-    return(
-        "\n\n".join([
-            "{0} {1} .".format(
-                subject,
-                " ;\n\t".join([
-                    "{0} {1}".format(
-                        predicate,
-                        object
-                    ) for predicate in ttl_dict[
-                        subject
-                    ] for object in ttl_dict[
-                        subject
-                    ][
-                        predicate
-                    ]
-                ])
-            ) for subject in ttl_dict
-        ])
-    )
+    return("".join(iter_turtle(ttl_dict, compact, prefixes)))
+
+
+def write_turtle(
+    ttl_dict,
+    fid,
+    buffer_size=1 << 16,
+    compact=False,
+    prefixes=None,
+    compression="infer"
+):
+    """
+    Function to write a dictionary as Terse Triple Language to a file-like
+    object without building the whole document in memory
+
+    Parameters
+    ----------
+    ttl_dict: dictionary
+        key: string
+            RDF subject
+        value: dictionary
+            key: string
+                RDF predicate
+            value: {string}
+                set of RDF objects
+
+    fid: file-like object or string
+        text stream with a `write` method, or a path to open with
+        open_output
+
+    buffer_size: int, optional
+        number of characters to collect before writing (and flushing, if
+        fid can flush); default 65536
+
+    compact: Boolean, optional
+        write each predicate once, with its objects separated by " , "
+
+    prefixes: iterable of 2-or-3-tuples, optional
+        prefixes to abbreviate full IRIs with; see iter_turtle
+
+    compression: string, optional
+        "gzip", "zstd", None or "infer" (default, from the file name) if
+        fid is a path; see open_output
+
+    Returns
+    -------
+    length: int
+        number of characters written
+
+    Example
+    -------
+    >>> import io
+    >>> fid = io.StringIO()
+    >>> write_turtle({
+    ...     "duck": {"continues": {"sitting"}},
+    ...     "goose": {"begins": {"chasing"}}
+    ... }, fid, buffer_size=1)
+    48
+    >>> fid.getvalue()
+    'duck continues sitting .\\n\\ngoose begins chasing .'
+    """
+    if isinstance(fid, str):
+        with open_output(fid, compression) as stream:
+            return(write_turtle(
+                ttl_dict,
+                stream,
+                buffer_size,
+                compact,
+                prefixes
+            ))
+    buffer = []
+    buffered = 0
+    length = 0
+    for chunk in iter_turtle(ttl_dict, compact, prefixes):
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= buffer_size:
+            fid.write("".join(buffer))
+            if hasattr(fid, "flush"):
+                fid.flush()
+            length += buffered
+            buffer = []
+            buffered = 0
+    if buffer:
+        fid.write("".join(buffer))
+        length += buffered
+    return(length)
 
 
 def write_about_statement(subject, predicate, object, predicates):
@@ -304,7 +859,7 @@ def write_header_prefixes(prefixes, imports=False):
         each tuple is
             [0] a prefix string
             [1] an iri string
-            [2] an optional import URL
+            [2] an optional import URL (None: not imported)
 
     imports : Boolean, optional, default=False
         import external ontologies?
@@ -312,6 +867,21 @@ def write_header_prefixes(prefixes, imports=False):
     Returns
     -------
     header_prefix: string
+
+    Example
+    -------
+    >>> header = write_header_prefixes([
+    ...     ("", "http://m.org/#"),
+    ...     ("owl", "http://www.w3.org/2002/07/owl#"),
+    ...     ("doi", "https://dx.doi.org/", None)
+    ... ], imports=True)
+    >>> print(header.split("<> owl:imports")[0].strip())
+    @prefix : <http://m.org/#> .
+    @prefix owl: <http://www.w3.org/2002/07/owl#> .
+    @prefix doi: <https://dx.doi.org/> .
+    @base <http://m.org/> .
+    >>> print("dx.doi.org" in header.split("<> owl:imports")[1])
+    False
     """
     header_prefix = ""
     for prefix in prefixes:
@@ -345,6 +915,8 @@ def write_header_prefixes(prefixes, imports=False):
                     prefix[2]
                 ) for prefix in prefixes if (
                     (
+                        len(prefix) < 3 or prefix[2] is not None
+                    ) and (
                         prefix[0] not in [
                             "mhdb"
                         ]